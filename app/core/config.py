@@ -35,6 +35,11 @@ class Settings:
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-3.5-turbo" if os.getenv("VERCEL", "").lower() in ["1", "true"] else "gemma3")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     
+    # Cache Configuration
+    CATEGORY_CACHE_TTL_SECONDS: int = int(os.getenv("CATEGORY_CACHE_TTL_SECONDS", 3600))
+    # Optional shared category cache across workers (needs the redis package); empty = in-process only
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
@@ -9,55 +9,252 @@ ssl._create_default_https_context = ssl._create_unverified_context
 
 # Now import everything else
 from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
+from starlette.datastructures import Headers, QueryParams
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from postgrest import AsyncPostgrestClient, CountMethod
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
 from pydantic import BaseModel
-import random
-import json
+import httpx
+import orjson
 import html
+import hashlib
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Deque, NamedTuple, Optional
+from functools import lru_cache, partial
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter, itemgetter
+from collections import Counter, OrderedDict, deque
+from itertools import islice
+from bisect import bisect_left
+from heapq import nlargest
+from array import array
 import asyncio
+import threading
 import time
+import string
+from urllib.parse import urlencode
 from app.core.config import settings
 
+# JSON response rendered with orjson (several times faster than stdlib json) - the app-wide default
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the periodic log flusher; on shutdown drain queued rows and release pools"""
+    log_flusher = asyncio.create_task(_log_flusher())
+    yield
+    log_flusher.cancel()
+    await flush_supabase_logs()  # Don't drop rows queued since the last tick
+    await async_supabase.aclose()
+    _background_db_pool.shutdown(wait=True)  # Let in-flight search tracking finish
+
 app = FastAPI(
     title="Spotive Travel Agent Concierge API",
     description="AI-Powered Travel Package Discovery API for Travel Agents",
-    version="0.2.0 (Travel Agent Concierge)"
+    version="0.2.0 (Travel Agent Concierge)",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+def _jdumps(obj: Any, indent: bool = False) -> str:
+    """Serialize to a JSON string with orjson (log pages, charts and CSV export)"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None).decode()
+
 # Audit logging storage (in-memory for MVP, can be moved to database later)
-audit_logs: List[Dict[str, Any]] = []
+class LogEntry(NamedTuple):
+    """One audit log record - a fixed-field tuple instead of a per-entry dict"""
+    timestamp: str
+    ts_epoch: float
+    method: str
+    path: str
+    query_params: Dict[str, str]
+    client_ip: str
+    user_agent: str
+    request_headers: Dict[str, str]
+    request_body: Any
+    status_code: int
+    response_headers: Dict[str, str]
+    response_body: Any
+    duration_ms: float
+    success: bool
+    error: Optional[str]
+    error_type: Optional[str]
+    escaped: Dict[str, str]  # HTML-escaped display fields for the log pages (not part of JSON output)
+
 MAX_LOGS = 1000  # Keep last 1000 logs
+audit_logs: Deque[LogEntry] = deque(maxlen=MAX_LOGS)  # Oldest entries drop off automatically (O(1))
+TIME_FILTER_SECONDS = {"hour": 3600, "day": 86400, "week": 604800}  # Log page time windows, compared against ts_epoch
+
+# Running aggregates over everything currently in audit_logs, kept in step on every insert/evict
+# so the unfiltered analytics view reads them instead of rescanning the buffer
+_audit_lock = threading.Lock()  # Middleware writes on the event loop; log pages read from threadpool threads
+_endpoint_counter: Counter = Counter()
+_method_counter: Counter = Counter()
+_client_counter: Counter = Counter()
+_status_counter: Counter = Counter()  # success flag -> count
+_error_counter: Counter = Counter()  # first 100 chars of failed requests' errors -> count
+# Running max of ts_epoch, parallel to audit_logs. Entries are appended when a request finishes but
+# stamped with its start time, so ts_epoch itself isn't strictly sorted; this array is, and bisecting
+# it gives the first entry that can fall inside a time window (callers still check ts_epoch exactly)
+_audit_window_epochs = array("d")
+_log_seq = 0  # Total entries ever recorded (keys the analytics page cache)
+_audit_log_added = asyncio.Event()  # Set (then replaced) on every new entry - wakes /api/logs/stream
+
+def _count_audit_log(log: LogEntry, delta: int):
+    """Add (delta=1) or remove (delta=-1) one log entry from the running aggregates"""
+    keys = [
+        (_endpoint_counter, log.path),
+        (_method_counter, log.method),
+        (_client_counter, log.client_ip),
+        (_status_counter, log.success)
+    ]
+    if not log.success and log.error:
+        keys.append((_error_counter, log.error[:100]))
+    for counter, key in keys:
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]  # Keep only keys still present in the buffer
+
+def record_audit_log(log_entry: LogEntry):
+    """Append a log entry, evicting the oldest past MAX_LOGS, and update the running aggregates"""
+    global _log_seq, _audit_log_added
+    with _audit_lock:
+        _log_seq += 1
+        if len(audit_logs) == MAX_LOGS:
+            _count_audit_log(audit_logs[0], -1)
+            del _audit_window_epochs[0]
+        audit_logs.append(log_entry)
+        _count_audit_log(log_entry, 1)
+        ts_epoch = log_entry.ts_epoch
+        _audit_window_epochs.append(max(ts_epoch, _audit_window_epochs[-1]) if _audit_window_epochs else ts_epoch)
+    # Wake live log streams (they hold this event); later waits pick up the fresh one
+    _audit_log_added.set()
+    _audit_log_added = asyncio.Event()
+
+def _audit_logs_since(since_epoch: float = None) -> List[LogEntry]:
+    """Copy of the audit log tail that can be newer than since_epoch (caller holds _audit_lock)"""
+    if since_epoch is None:
+        return list(audit_logs)
+    return list(islice(audit_logs, bisect_left(_audit_window_epochs, since_epoch), None))
+
+def _filter_audit_logs(logs: List[LogEntry], cutoff_epoch: float, endpoint: str, status: str) -> List[LogEntry]:
+    """Apply the logs page / CSV export time, endpoint and status filters in a single pass"""
+    want_success = {"success": True, "failed": False}.get(status)  # None - any status
+    if cutoff_epoch is None and endpoint == "all" and want_success is None:
+        return logs
+    return [
+        log for log in logs
+        if (cutoff_epoch is None or log.ts_epoch > cutoff_epoch)
+        and (endpoint == "all" or log.path == endpoint)
+        and (want_success is None or log.success == want_success)
+    ]
+
+# Pooled HTTP connections to Supabase - keep-alive + HTTP/2 so successive calls reuse one
+# TLS session instead of paying a handshake per request
+SUPABASE_HTTP_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
+SUPABASE_HTTP_TIMEOUT = httpx.Timeout(10.0)
 
 # Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+supabase: Client = create_client(
+    settings.SUPABASE_URL,
+    settings.SUPABASE_KEY,
+    options=ClientOptions(
+        httpx_client=httpx.Client(http2=True, limits=SUPABASE_HTTP_LIMITS, timeout=SUPABASE_HTTP_TIMEOUT)
+    )
+)
 
-# Background task to log API calls to Supabase
-def log_to_supabase(log_data: Dict[str, Any]):
-    """Log API call details to Supabase for analytics (runs in background)"""
-    try:
-        supabase.table('api_logs').insert({
-            "timestamp": log_data.get("timestamp"),
-            "endpoint": log_data.get("endpoint"),
-            "interests": log_data.get("interests"),
-            "mapped_categories": log_data.get("mapped_categories"),
-            "mapping_method": log_data.get("mapping_method"),  # "llm" or "keyword_fallback"
-            "total_matching_events": log_data.get("total_matching_events"),
-            "selected_event_id": log_data.get("selected_event_id"),
-            "selected_event_name": log_data.get("selected_event_name"),
-            "selected_event_category": log_data.get("selected_event_category"),
-            "success": log_data.get("success"),
-            "error_message": log_data.get("error_message"),
-            "response_time_ms": log_data.get("response_time_ms"),
-            "client_ip": log_data.get("client_ip"),
-            "user_agent": log_data.get("user_agent")
-        }).execute()
-    except Exception as e:
-        print(f"Failed to log to Supabase: {e}")
+# Async PostgREST client for hot paths - Supabase round-trips don't block the event loop
+async_supabase = AsyncPostgrestClient(
+    f"{settings.SUPABASE_URL}/rest/v1",
+    headers={
+        **DEFAULT_POSTGREST_CLIENT_HEADERS,
+        "apikey": settings.SUPABASE_KEY,
+        "Authorization": f"Bearer {settings.SUPABASE_KEY}"
+    },
+    http_client=httpx.AsyncClient(http2=True, limits=SUPABASE_HTTP_LIMITS, timeout=SUPABASE_HTTP_TIMEOUT)
+)
+
+# Package queries: only the columns the package endpoints read, and a hard row cap so a
+# broad match can't pull the whole table into memory
+PACKAGE_COLUMNS = (
+    "id,name,category,description,short_description,destination,destination_country,"
+    "duration_days,duration_nights,price_range,price_min,price_max,currency,inclusions,"
+    "exclusions,highlights,image_urls,main_image_url,booking_link,travel_agent_id,"
+    "travel_agent_name,is_active"
+)
+PACKAGE_QUERY_LIMIT = 256
+
+# Batched API call logging - rows go into a bounded in-memory queue and are bulk-inserted
+# into Supabase api_logs instead of one INSERT per request. Each logging request drains the
+# queue from its BackgroundTasks (serverless instances can freeze before the next timer tick);
+# a periodic flusher also runs while the process is alive
+LOG_FLUSH_INTERVAL_SECONDS = 0.5
+LOG_BATCH_SIZE = 500  # Max rows per bulk insert (stay well under PostgREST request-size limits)
+LOG_QUEUE_MAXSIZE = 10000  # Oldest rows are dropped past this, so a Supabase outage can't grow memory
+# deque append/popleft are atomic, so sync endpoints can enqueue from threadpool threads
+_log_queue: Deque[Dict[str, Any]] = deque(maxlen=LOG_QUEUE_MAXSIZE)
+
+def log_to_supabase(log_data: Dict[str, Any], background_tasks: BackgroundTasks):
+    """Queue API call details for a bulk insert into Supabase (analytics), drained after the response"""
+    row = {
+        "timestamp": log_data.get("timestamp"),
+        "endpoint": log_data.get("endpoint"),
+        "interests": log_data.get("interests"),
+        "mapped_categories": log_data.get("mapped_categories"),
+        "mapping_method": log_data.get("mapping_method"),  # "llm" or "keyword_fallback"
+        "total_matching_events": log_data.get("total_matching_events"),
+        "selected_event_id": log_data.get("selected_event_id"),
+        "selected_event_name": log_data.get("selected_event_name"),
+        "selected_event_category": log_data.get("selected_event_category"),
+        "success": log_data.get("success"),
+        "error_message": log_data.get("error_message"),
+        "response_time_ms": log_data.get("response_time_ms"),
+        "client_ip": log_data.get("client_ip"),
+        "user_agent": log_data.get("user_agent")
+    }
+    _log_queue.append(row)
+    if not any(task.func is flush_supabase_logs for task in background_tasks.tasks):
+        background_tasks.add_task(flush_supabase_logs)
+
+async def flush_supabase_logs():
+    """Drain the log queue into Supabase, LOG_BATCH_SIZE rows per bulk insert"""
+    while _log_queue:
+        batch = []
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                batch.append(_log_queue.popleft())
+        except IndexError:
+            pass  # Queue drained
+        
+        try:
+            await async_supabase.table('api_logs').insert(batch).execute()
+        except Exception as e:
+            print(f"Failed to log to Supabase: {e}")
+
+async def _log_flusher():
+    """Flush queued log rows every LOG_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(LOG_FLUSH_INTERVAL_SECONDS)
+        await flush_supabase_logs()
+
+# Post-response Supabase writes (search tracking) run on their own small pool, so a burst of
+# them can't starve sync endpoints of the shared anyio threadpool or flood Supabase
+BACKGROUND_DB_WORKERS = 4
+_background_db_pool = ThreadPoolExecutor(max_workers=BACKGROUND_DB_WORKERS, thread_name_prefix="supabase-bg")
+
+async def run_in_background_pool(func, *args):
+    """Run a blocking Supabase helper on the background pool (awaited, so a BackgroundTasks entry still waits for it)"""
+    await asyncio.get_running_loop().run_in_executor(_background_db_pool, partial(func, *args))
 
 # Initialize the LLM model based on provider (Ollama for local, OpenAI for production)
 def get_llm_model():
@@ -83,9 +280,10 @@ except Exception as e:
     model = None
     llm_available = False
 
-# Create the prompt template for conversational package descriptions
-package_prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are Spotive, a friendly AI travel concierge assistant helping clients discover travel packages. 
+# Static system prompts - kept free of per-request variables so every call shares an
+# identical prefix (provider-side prompt caching / Ollama KV reuse). Dynamic fields
+# only ever appear at the tail of the human message.
+PACKAGE_SYSTEM_PROMPT = """You are Spotive, a friendly AI travel concierge assistant helping clients discover travel packages. 
     
     You'll be given details about a travel package. Your job is to present it in an exciting, conversational way.
     
@@ -95,20 +293,9 @@ package_prompt = ChatPromptTemplate.from_messages([
     - Line 3: Mention destination, duration, and price in a casual way
     
     Be enthusiastic but natural! Help them visualize the amazing experience.
-    Don't use JSON or structured data - just talk like a normal person would."""),
-    ("human", """Tell me about this travel package in a friendly, conversational way:
-    
-Package Name: {name}
-Category: {category}
-Description: {description}
-Destination: {destination}
-Duration: {duration_days} days
-Price: {price_range}""")
-])
+    Don't use JSON or structured data - just talk like a normal person would."""
 
-# LLM prompt to map interests to package categories
-category_mapping_prompt = ChatPromptTemplate.from_messages([
-    ("system", """You are an intelligent category mapping system for Spotive travel package discovery.
+CATEGORY_MAPPING_SYSTEM_PROMPT = """You are an intelligent category mapping system for Spotive travel package discovery.
 
 Your job is to map user interests to our predefined travel package categories.
 
@@ -152,10 +339,31 @@ Your job is to map user interests to our predefined travel package categories.
 - "adventure, trekking" → ["adventure"]
 
 **DO NOT return all 14 categories - only return what matches!**
-"""),
-    ("human", "User interests: {interests}\n\nReturn ONLY the JSON array of matching categories (max 3):")
+"""
+
+# Create the prompt template for conversational package descriptions
+package_prompt = ChatPromptTemplate.from_messages([
+    ("system", PACKAGE_SYSTEM_PROMPT),
+    ("human", """Tell me about this travel package in a friendly, conversational way:
+    
+Package Name: {name}
+Category: {category}
+Description: {description}
+Destination: {destination}
+Duration: {duration_days} days
+Price: {price_range}""")
+])
+
+# LLM prompt to map interests to package categories
+category_mapping_prompt = ChatPromptTemplate.from_messages([
+    ("system", CATEGORY_MAPPING_SYSTEM_PROMPT),
+    ("human", "Return ONLY the JSON array of matching categories (max 3).\n\nUser interests: {interests}")
 ])
 
+# Runnable chains built once (| allocates a new RunnableSequence on every call)
+mapping_chain = category_mapping_prompt | model if model else None
+package_chain = package_prompt | model if model else None
+
 # Pydantic models for requests and responses
 class PackageInterestsRequest(BaseModel):
     interests: str  # Comma-separated interests
@@ -259,11 +467,12 @@ def get_or_create_user(phone_number: str, username: str = None) -> Dict[str, Any
             return user
         else:
             # Create new user
+            now_iso = datetime.now().isoformat()
             new_user = {
                 "phone_number": phone_number,
                 "username": username or "User",
-                "created_at": datetime.now().isoformat(),
-                "last_active": datetime.now().isoformat(),
+                "created_at": now_iso,
+                "last_active": now_iso,
                 "total_searches": 0,
                 "favorite_categories": {}
             }
@@ -283,6 +492,7 @@ def track_user_search(phone_number: str, search_query: str, search_type: str, ma
         
         user = user_response.data[0]
         user_id = user.get('id')
+        now_iso = datetime.now().isoformat()  # One timestamp for the history row and last_active
         
         # Insert search history
         search_entry = {
@@ -290,7 +500,7 @@ def track_user_search(phone_number: str, search_query: str, search_type: str, ma
             "search_query": search_query,
             "search_type": search_type,  # 'interests' or 'destination'
             "mapped_categories": mapped_categories or [],
-            "search_timestamp": datetime.now().isoformat(),
+            "search_timestamp": now_iso,
             "results_count": results_count
         }
         
@@ -329,7 +539,7 @@ def track_user_search(phone_number: str, search_query: str, search_type: str, ma
         # Update user record
         update_data = {
             "total_searches": user.get('total_searches', 0) + 1,
-            "last_active": datetime.now().isoformat()
+            "last_active": now_iso
         }
         
         if mapped_categories:
@@ -362,15 +572,19 @@ def get_user_top_categories(phone_number: str, limit: int = 3) -> List[str]:
         if not isinstance(favorite_categories, dict):
             return []
         
-        # Sort by count and return top N
-        sorted_categories = sorted(favorite_categories.items(), key=lambda x: x[1], reverse=True)
-        return [cat for cat, _ in sorted_categories[:limit]]
+        # Top N by count (heap selection - same order as a full descending sort)
+        return [cat for cat, _ in nlargest(limit, favorite_categories.items(), key=itemgetter(1))]
     except Exception as e:
         print(f"Error getting user top categories: {e}")
         return []
 
+# Predefined package categories (must match database exactly) - the list is what clients see
+# in error hints, the frozenset gives O(1) membership checks when filtering mapped categories
+VALID_CATEGORIES = ["adventure", "family", "honeymoon", "luxury", "beach", "cultural", "spiritual", "sports", "cruise", "safari", "wellness", "group", "solo", "corporate"]
+VALID_CATEGORY_SET = frozenset(VALID_CATEGORIES)
+
 # Keyword-based category matching as fallback (for packages)
-def keyword_match_categories(interests: str, valid_categories: list) -> list:
+def keyword_match_categories(interests: str, valid_categories: frozenset) -> list:
     """
     Fallback keyword matching when LLM fails
     Maps interests to package categories using keyword matching
@@ -408,125 +622,239 @@ def keyword_match_categories(interests: str, valid_categories: list) -> list:
     # If no matches found, return empty (will trigger error message)
     return matched[:3]  # Max 3 categories
 
-# Middleware to log all API calls
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests and responses for audit and debugging"""
-    start_time = datetime.now()
-    
-    # Capture request details
-    log_entry = {
-        "timestamp": start_time.isoformat(),
-        "method": request.method,
-        "path": request.url.path,
-        "query_params": dict(request.query_params),
-        "client_ip": request.client.host if request.client else "unknown",
-        "user_agent": request.headers.get("user-agent", "unknown"),
-        "request_headers": dict(request.headers)
-    }
+# LLM category mapping with an in-process cache (same interests -> same categories)
+def _normalize_interests(interests: str) -> tuple:
+    """Normalize comma-separated interests into a cache key (lowercased, deduplicated, sorted)"""
+    return tuple(sorted({token.strip().lower() for token in interests.split(',') if token.strip()}))
+
+# First bracketed array in the LLM reply (models often wrap it in code fences or prose)
+_ARRAY_RE = re.compile(r"\[[^\[\]]*\]", re.S)
+
+# Optional Redis tier behind the in-process cache, so every worker/instance shares mappings
+@lru_cache(maxsize=1)
+def get_redis_client():
+    """Redis client for the shared category cache, created on first use (None when REDIS_URL isn't set or redis is unavailable)"""
+    if not settings.REDIS_URL:
+        return None
+    try:
+        import redis  # Optional dependency - see requirements.txt
+        # Short timeouts - a slow or unreachable Redis must never cost more than the LLM call it saves
+        return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    except Exception as e:
+        print(f"Warning: Redis initialization failed: {e}")
+        return None
+
+def _category_cache_key(interests_key: tuple) -> str:
+    """Redis key for normalized interests (hashed - raw interests are client input of any length)"""
+    return "spotive:categories:" + hashlib.sha1(",".join(interests_key).encode()).hexdigest()
+
+@lru_cache(maxsize=4096)
+def _map_interests(interests_key: tuple, ttl_bucket: int) -> tuple:
+    """
+    Ask the LLM to map normalized interests to categories.
+    ttl_bucket changes every CATEGORY_CACHE_TTL_SECONDS so cached mappings expire.
+    Unparseable responses raise, so failed mappings are never cached.
+    """
+    redis_client = get_redis_client()
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(_category_cache_key(interests_key))
+            if cached is not None:
+                return tuple(orjson.loads(cached))
+        except Exception as e:
+            print(f"Redis category cache read failed: {e}")
+    
+    mapping_response = mapping_chain.invoke({"interests": ", ".join(interests_key)})
+    
+    llm_raw_response = mapping_response.content.strip()
+    print(f"DEBUG - LLM raw response for {interests_key}: {llm_raw_response}")
+    
+    match = _ARRAY_RE.search(llm_raw_response)
+    if not match:
+        raise ValueError(f"No JSON array in LLM response: {llm_raw_response}")
+    categories = orjson.loads(match.group(0))
+    if not isinstance(categories, list):
+        raise ValueError(f"LLM returned non-list: {llm_raw_response}")
+    categories = tuple(cat.lower() for cat in categories)
     
-    # Capture request body for POST requests
-    if request.method in ["POST", "PUT", "PATCH"]:
+    if redis_client is not None:
         try:
-            body = await request.body()
-            if body:
-                try:
-                    log_entry["request_body"] = json.loads(body.decode())
-                except:
-                    log_entry["request_body"] = body.decode() if body else None
-            else:
-                log_entry["request_body"] = None
-            # Recreate request with body for downstream processing
-            async def receive():
-                return {"type": "http.request", "body": body}
-            request = Request(request.scope, receive=receive)
+            redis_client.setex(_category_cache_key(interests_key), settings.CATEGORY_CACHE_TTL_SECONDS, orjson.dumps(categories))
         except Exception as e:
-            log_entry["request_body_error"] = str(e)
-            log_entry["request_body"] = body.decode() if body else None
+            print(f"Redis category cache write failed: {e}")
+    return categories
+
+def map_interests_to_categories(interests: str) -> list:
+    """Map interests to categories using the LLM, served from cache when seen recently"""
+    ttl_bucket = int(time.time() // settings.CATEGORY_CACHE_TTL_SECONDS)
+    return list(_map_interests(_normalize_interests(interests), ttl_bucket))
+
+# Conversational package descriptions, cached per prompt inputs (LRU)
+SUGGESTION_CACHE_SIZE = 2048
+_suggestion_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_suggestion_cache_lock = threading.Lock()
+
+def generate_package_suggestion(package: Dict[str, Any]) -> str:
+    """Generate a conversational package description, reusing the cached one for repeat packages"""
+    prompt_inputs = {
+        "name": package.get("name", "Unknown Package"),
+        "category": package.get("category", "package"),
+        "description": package.get("description") or package.get("short_description", "An amazing travel package"),
+        "destination": package.get("destination", "Unknown"),
+        "duration_days": package.get("duration_days", 0),
+        "price_range": package.get("price_range", "Contact for pricing")
+    }
+    # Key on everything the prompt sees, so edited packages get a fresh description
+    cache_key = tuple(str(value) for value in prompt_inputs.values())
+    
+    with _suggestion_cache_lock:
+        cached = _suggestion_cache.get(cache_key)
+        if cached is not None:
+            _suggestion_cache.move_to_end(cache_key)
+            return cached
+    
+    suggestion = package_chain.invoke(prompt_inputs).content
+    
+    with _suggestion_cache_lock:
+        _suggestion_cache[cache_key] = suggestion
+        _suggestion_cache.move_to_end(cache_key)
+        if len(_suggestion_cache) > SUGGESTION_CACHE_SIZE:
+            _suggestion_cache.popitem(last=False)
+    return suggestion
+
+# Log fields rendered on the HTML log pages - escaped once when the entry is recorded
+_HTML_ESCAPED_FIELDS = ("method", "path", "timestamp", "client_ip", "user_agent", "error", "error_type")
+
+RESPONSE_BODY_CAPTURE_LIMIT = 2000  # Bytes of a JSON response body kept per audit entry
+
+# Middleware to log all API calls
+# Pure ASGI (not @app.middleware("http")) - avoids BaseHTTPMiddleware's extra task group,
+# Request/Response wrappers and body re-buffering on every request
+class AuditLogMiddleware:
+    """Log all incoming requests and responses for audit and debugging"""
     
-    # Process request
-    try:
-        response = await call_next(request)
-        log_entry["status_code"] = response.status_code
-        log_entry["success"] = 200 <= response.status_code < 400
-        log_entry["error"] = None
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Capture response headers
-        log_entry["response_headers"] = dict(response.headers)
+        start_time = datetime.now()
+        start_perf = time.perf_counter()
+        request_headers = Headers(scope=scope)
+        client = scope.get("client")
+        
+        # Capture request details - every field is written up front (response fields get
+        # placeholders) and the finished dict becomes a LogEntry
+        log_entry = {
+            "timestamp": start_time.isoformat(),
+            "ts_epoch": start_time.timestamp(),  # Parsed once here so filters never re-parse ISO strings
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_params": dict(QueryParams(scope.get("query_string", b""))),
+            "client_ip": client[0] if client else "unknown",
+            "user_agent": request_headers.get("user-agent", "unknown"),
+            "request_headers": dict(request_headers),
+            "request_body": None,
+            "status_code": 500,
+            "response_headers": {},
+            "response_body": None,
+            "duration_ms": 0.0,
+            "success": False,
+            "error": None,
+            "error_type": None
+        }
+        
+        # Tee the request body for POST/PUT/PATCH as the app reads it (no second read)
+        request_body = bytearray()
+        capture_request_body = scope["method"] in ("POST", "PUT", "PATCH")
+        
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
+        
+        # Snapshot status/headers and keep the head of JSON response bodies for the logs page.
+        # The log views are skipped - their bodies contain earlier entries and would feed back into the log
+        response_started = False
+        response_content_type = ""
+        response_body = bytearray()
+        response_body_size = 0
+        capture_response_body = not scope["path"].startswith("/api/logs")
+        
+        async def send_wrapper(message):
+            nonlocal response_started, response_content_type, response_body_size
+            if message["type"] == "http.response.start":
+                response_started = True
+                response_headers = Headers(raw=message.get("headers", []))
+                log_entry["status_code"] = message["status"]
+                log_entry["response_headers"] = dict(response_headers)
+                response_content_type = response_headers.get("content-type", "")
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response_body_size += len(chunk)
+                if capture_response_body and response_content_type.startswith("application/json") and len(response_body) < RESPONSE_BODY_CAPTURE_LIMIT:
+                    response_body.extend(chunk[:RESPONSE_BODY_CAPTURE_LIMIT - len(response_body)])
+            await send(message)
         
-        # Capture response body by reading it
         try:
-            if hasattr(response, 'body_iterator'):
-                # For streaming responses, we can't easily capture body
-                log_entry["response_body"] = None
-            elif isinstance(response, JSONResponse):
-                # For JSONResponse, we can get the content
-                if hasattr(response, 'body'):
-                    body_bytes = response.body
-                    if body_bytes:
-                        try:
-                            log_entry["response_body"] = json.loads(body_bytes.decode())
-                        except:
-                            log_entry["response_body"] = body_bytes.decode()[:2000]  # Limit to 2000 chars
-                elif hasattr(response, 'content'):
-                    # Try to get content directly
-                    try:
-                        if isinstance(response.content, (dict, list)):
-                            log_entry["response_body"] = response.content
-                        elif isinstance(response.content, str):
-                            try:
-                                log_entry["response_body"] = json.loads(response.content)
-                            except:
-                                log_entry["response_body"] = response.content[:2000]
-                        else:
-                            log_entry["response_body"] = None
-                    except:
-                        log_entry["response_body"] = None
-                else:
-                    log_entry["response_body"] = None
-            elif isinstance(response, HTMLResponse):
-                # For HTML responses, capture a snippet
-                if hasattr(response, 'content') and response.content:
-                    content_str = response.content if isinstance(response.content, str) else response.content.decode()[:500]
-                    log_entry["response_body"] = f"<HTML Response (truncated): {len(content_str)} chars>"
-                else:
-                    log_entry["response_body"] = None
-            else:
-                log_entry["response_body"] = None
+            await self.app(scope, receive_wrapper if capture_request_body else receive, send_wrapper)
+            log_entry["success"] = 200 <= log_entry["status_code"] < 400
         except Exception as e:
-            log_entry["response_body"] = None
-            log_entry["response_body_error"] = str(e)
+            log_entry["success"] = False
+            log_entry["error"] = str(e)
+            log_entry["error_type"] = type(e).__name__
+            if response_started:
+                raise
+            # Create error response
+            error_response = ORJSONResponse(
+                status_code=500,
+                content={"success": False, "error": str(e)}
+            )
+            await error_response(scope, receive, send)
+        finally:
+            # Calculate duration
+            log_entry["duration_ms"] = round((time.perf_counter() - start_perf) * 1000, 2)
             
-    except Exception as e:
-        log_entry["status_code"] = 500
-        log_entry["success"] = False
-        log_entry["error"] = str(e)
-        log_entry["error_type"] = type(e).__name__
-        log_entry["response_headers"] = {}
-        log_entry["response_body"] = None
-        # Create error response
-        response = JSONResponse(
-            status_code=500,
-            content={"success": False, "error": str(e)}
-        )
-    finally:
-        # Calculate duration
-        end_time = datetime.now()
-        log_entry["duration_ms"] = round((end_time - start_time).total_seconds() * 1000, 2)
-        
-        # Add to audit logs (keep only last MAX_LOGS entries)
-        audit_logs.append(log_entry)
-        if len(audit_logs) > MAX_LOGS:
-            audit_logs.pop(0)
-    
-    return response
+            if capture_request_body and request_body:
+                try:
+                    log_entry["request_body"] = orjson.loads(request_body)
+                except:
+                    log_entry["request_body"] = request_body.decode(errors="replace")
+            
+            # Capture response body (small JSON parsed, larger JSON truncated, HTML summarized)
+            if response_body and response_body_size > RESPONSE_BODY_CAPTURE_LIMIT:
+                log_entry["response_body"] = f"{response_body.decode(errors='replace')}... (truncated, {response_body_size} bytes)"
+            elif response_body:
+                try:
+                    log_entry["response_body"] = orjson.loads(response_body)
+                except:
+                    log_entry["response_body"] = response_body.decode(errors="replace")
+            elif response_body_size and response_content_type.startswith("text/html"):
+                log_entry["response_body"] = f"<HTML Response (truncated): {response_body_size} chars>"
+            
+            # Escape display fields once here so page renders never re-escape (or emit raw client input)
+            escaped = {
+                key: html.escape(str(log_entry[key])) if log_entry[key] is not None else "" for key in _HTML_ESCAPED_FIELDS
+            }
+            
+            # Add to audit logs (deque keeps only the last MAX_LOGS entries)
+            record_audit_log(LogEntry(**log_entry, escaped=escaped))
+
+app.add_middleware(AuditLogMiddleware)
+# Compress larger HTML/JSON responses (logs pages, /api/logs/json). Added after the audit middleware
+# so it wraps it - audit timing and body capture still see the uncompressed response
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 @app.get("/")
 def read_root():
     """
     Root endpoint - API health check
     """
-    return {
+    return ORJSONResponse(content={
         "message": "Welcome to Spotive API!",
         "status": "active",
         "version": "0.1.0 (MVP)",
@@ -539,7 +867,7 @@ def read_root():
             "llm_available": llm_available
         },
         "note": "Connected to Supabase with LLM-powered conversational responses" if llm_available else "Connected to Supabase (LLM unavailable)"
-    }
+    })
 
 # ==================== HOTEL MANAGEMENT ENDPOINTS ====================
 
@@ -560,7 +888,7 @@ def register_user(request: UserRegisterRequest):
     try:
         # Validate phone number
         if not validate_phone_number(request.phone_number):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -572,7 +900,7 @@ def register_user(request: UserRegisterRequest):
         user = get_or_create_user(request.phone_number, request.username)
         
         if not user:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={
                     "success": False,
@@ -580,7 +908,7 @@ def register_user(request: UserRegisterRequest):
                 }
             )
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "User registered successfully" if user.get('total_searches', 0) == 0 else "Welcome back!",
             "user": {
@@ -595,7 +923,7 @@ def register_user(request: UserRegisterRequest):
             }
         })
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -616,7 +944,7 @@ def get_user_profile(phone_number: str):
     try:
         # Validate phone number
         if not validate_phone_number(phone_number):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -628,7 +956,7 @@ def get_user_profile(phone_number: str):
         user_response = supabase.table('users').select("*").eq('phone_number', phone_number).execute()
         
         if not user_response.data or len(user_response.data) == 0:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "success": False,
@@ -654,7 +982,7 @@ def get_user_profile(phone_number: str):
         
         preferences = preferences_response.data[0] if preferences_response.data else None
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "user": {
                 "id": user.get("id"),
@@ -684,7 +1012,7 @@ def get_user_profile(phone_number: str):
             ] if search_history_response.data else []
         })
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -712,7 +1040,7 @@ def update_user_preferences(phone_number: str, preferences: UserPreferencesUpdat
     try:
         # Validate phone number
         if not validate_phone_number(phone_number):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -723,7 +1051,7 @@ def update_user_preferences(phone_number: str, preferences: UserPreferencesUpdat
         # Check if user exists
         user_response = supabase.table('users').select("id").eq('phone_number', phone_number).execute()
         if not user_response.data:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "success": False,
@@ -767,13 +1095,13 @@ def update_user_preferences(phone_number: str, preferences: UserPreferencesUpdat
                 .insert(update_data)\
                 .execute()
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "message": "Preferences updated successfully",
             "preferences": result.data[0] if result.data else update_data
         })
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -797,7 +1125,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
     try:
         # Validate phone number
         if not validate_phone_number(phone_number):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -808,7 +1136,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
         # Get or create user
         user = get_or_create_user(phone_number)
         if not user:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500,
                 content={"success": False, "error": "Failed to get user"}
             )
@@ -825,7 +1153,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
         else:
             # No interests provided - use profile only
             if not user_top_categories:
-                return JSONResponse(
+                return ORJSONResponse(
                     status_code=400,
                     content={
                         "success": False,
@@ -835,33 +1163,23 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
             combined_interests = ", ".join(user_top_categories)
         
         # Use the same logic as /api/package/by-interests
-        valid_categories = ["adventure", "family", "honeymoon", "luxury", "beach", "cultural", "spiritual", "sports", "cruise", "safari", "wellness", "group", "solo", "corporate"]
-        
         # Map interests to categories
         categories = []
         mapping_method = "llm"
         
         if llm_available and model:
             try:
-                mapping_chain = category_mapping_prompt | model
-                mapping_response = mapping_chain.invoke({"interests": combined_interests})
-                
-                llm_raw_response = mapping_response.content.strip()
-                categories = json.loads(llm_raw_response)
-                
-                if not isinstance(categories, list):
-                    categories = []
-                else:
-                    categories = [cat.lower() for cat in categories if cat.lower() in valid_categories]
+                categories = map_interests_to_categories(combined_interests)
+                categories = [cat for cat in categories if cat in VALID_CATEGORY_SET]
             except:
                 categories = []
         
         if len(categories) == 0 or len(categories) > 4:
-            categories = keyword_match_categories(combined_interests, valid_categories)
+            categories = keyword_match_categories(combined_interests, VALID_CATEGORY_SET)
             mapping_method = "keyword_fallback"
         
         if not categories:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -870,10 +1188,13 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
                 }
             )
         
-        # Query packages
+        # Query packages - only the 5 that get returned cross the wire, the rest is counted server-side
         packages = []
+        total_matching = 0
         for category in categories:
-            response = supabase.table('packages').select("*").eq('category', category).eq('is_active', True).order('is_featured', desc=True).execute()
+            remaining = max(5 - len(packages), 0)
+            response = supabase.table('packages').select(PACKAGE_COLUMNS, count=CountMethod.exact).eq('category', category).eq('is_active', True).order('is_featured', desc=True).limit(remaining).execute()
+            total_matching += response.count if response.count is not None else len(response.data or [])
             if response.data:
                 packages.extend(response.data)
         
@@ -881,7 +1202,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
             # Track search
             track_user_search(phone_number, combined_interests, "interests", categories, None, 0)
             
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "success": False,
@@ -898,16 +1219,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
         for package in selected_packages:
             if llm_available and model:
                 try:
-                    chain = package_prompt | model
-                    llm_response = chain.invoke({
-                        "name": package.get("name", "Unknown Package"),
-                        "category": package.get("category", "package"),
-                        "description": package.get("description") or package.get("short_description", "An amazing travel package"),
-                        "destination": package.get("destination", "Unknown"),
-                        "duration_days": package.get("duration_days", 0),
-                        "price_range": package.get("price_range", "Contact for pricing")
-                    })
-                    suggestion = llm_response.content
+                    suggestion = generate_package_suggestion(package)
                 except:
                     suggestion = f"Check out {package.get('name', 'this package')} in {package.get('destination', 'amazing destination')}!"
             else:
@@ -939,9 +1251,9 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
             })
         
         # Track search (accumulate preferences)
-        track_user_search(phone_number, combined_interests, "interests", categories, None, len(packages))
+        track_user_search(phone_number, combined_interests, "interests", categories, None, total_matching)
         
-        return JSONResponse(content={
+        return ORJSONResponse(content={
             "success": True,
             "personalized": True,
             "user_top_categories": user_top_categories,
@@ -949,14 +1261,14 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
             "combined_interests_used": combined_interests,
             "mapped_categories": categories,
             "mapping_method": mapping_method,
-            "total_matching_packages": len(packages),
+            "total_matching_packages": total_matching,
             "returned_packages": len(packages_with_suggestions),
             "packages": packages_with_suggestions,
             "source": "Supabase",
             "ai_generated": llm_available
         })
     except Exception as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -965,7 +1277,7 @@ def discover_packages_personalized(phone_number: str, request: DiscoverPackagesR
         )
 
 @app.post("/api/package/by-interests")
-def get_package_by_interests(
+async def get_package_by_interests(
     request: PackageInterestsRequest, 
     background_tasks: BackgroundTasks, 
     req: Request
@@ -996,38 +1308,28 @@ def get_package_by_interests(
     
     NOTE: For full personalization features, use /api/users/{phone_number}/discover-packages
     """
-    start_time = datetime.now()
+    start_perf = time.perf_counter()
+    request_timestamp = datetime.now().isoformat()  # One wall-clock read per request
+    # Resolve client info once for all log sites below
+    client_ip = req.client.host if req.client else "unknown"
+    user_agent = req.headers.get("user-agent", "unknown")
     try:
-        # Predefined package categories (must match database exactly)
-        valid_categories = ["adventure", "family", "honeymoon", "luxury", "beach", "cultural", "spiritual", "sports", "cruise", "safari", "wellness", "group", "solo", "corporate"]
-        
         # Step 1: Use LLM to map interests to categories
         categories = []
         
         if llm_available and model:
             try:
-                mapping_chain = category_mapping_prompt | model
-                mapping_response = mapping_chain.invoke({"interests": request.interests})
+                # Cached per normalized interests - repeat searches skip the LLM call
+                categories = await run_in_threadpool(map_interests_to_categories, request.interests)
+                print(f"DEBUG - Parsed categories: {categories}")
                 
-                # Parse the LLM response to get categories
-                try:
-                    llm_raw_response = mapping_response.content.strip()
-                    print(f"DEBUG - LLM raw response for '{request.interests}': {llm_raw_response}")
-                    
-                    categories = json.loads(llm_raw_response)
-                    print(f"DEBUG - Parsed categories: {categories}")
-                    
-                    if not isinstance(categories, list):
-                        print(f"DEBUG - LLM returned non-list, using fallback")
-                        categories = []
-                    else:
-                        # Filter to only valid categories
-                        original_count = len(categories)
-                        categories = [cat.lower() for cat in categories if cat.lower() in valid_categories]
-                        print(f"DEBUG - After validation: {categories} (filtered from {original_count})")
-                except json.JSONDecodeError as e:
-                    print(f"DEBUG - JSON decode error: {e}, using fallback")
-                    categories = []
+                # Filter to only valid categories
+                original_count = len(categories)
+                categories = [cat for cat in categories if cat in VALID_CATEGORY_SET]
+                print(f"DEBUG - After validation: {categories} (filtered from {original_count})")
+            except orjson.JSONDecodeError as e:
+                print(f"DEBUG - JSON decode error: {e}, using fallback")
+                categories = []
             except Exception as e:
                 print(f"Category mapping failed: {e}")
                 categories = []
@@ -1036,18 +1338,18 @@ def get_package_by_interests(
         mapping_method = "llm"
         if len(categories) == 0 or len(categories) > 4:
             print(f"DEBUG - LLM returned invalid categories ({len(categories)}), using keyword matching fallback")
-            categories = keyword_match_categories(request.interests, valid_categories)
+            categories = keyword_match_categories(request.interests, VALID_CATEGORY_SET)
             mapping_method = "keyword_fallback"
             print(f"DEBUG - Keyword matching result: {categories}")
         
         # Final validation: If still no categories, return error
         if not categories:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
                     "message": f"Could not map interests '{request.interests}' to any package categories. Please try different interests.",
-                    "valid_categories": valid_categories,
+                    "valid_categories": VALID_CATEGORIES,
                     "hint": "Try: honeymoon, adventure, family, beach, luxury, cultural, wellness"
                 }
             )
@@ -1055,8 +1357,11 @@ def get_package_by_interests(
         # Step 2: Query Supabase for packages matching any of the categories
         packages = []
         package_ids = set()  # Track to avoid duplicates
+        total_matching = 0  # Server-side match count (rows beyond the first 5 are never fetched)
         
-        for category in categories:
+        # Only the first 5 packages are returned, so no category needs more than 5 rows
+        async def fetch_category(category: str):
+            """Query one category (active packages first, then any), or None if both queries fail"""
             print(f"DEBUG - Searching for category: '{category}'")
             
             # Query by category - try multiple approaches
@@ -1064,7 +1369,7 @@ def get_package_by_interests(
             
             # Approach 1: Try with is_active=True
             try:
-                query = supabase.table('packages').select("*").eq('category', category)
+                query = async_supabase.table('packages').select(PACKAGE_COLUMNS, count=CountMethod.exact).eq('category', category)
                 
                 # Filter by travel agent if provided
                 if request.travel_agent_id:
@@ -1072,13 +1377,13 @@ def get_package_by_interests(
                 
                 # Try with is_active=True first
                 query_active = query.eq('is_active', True)
-                response = query_active.order('is_featured', desc=True).order('display_order').execute()
+                response = await query_active.order('is_featured', desc=True).order('display_order').limit(5).execute()
                 print(f"DEBUG - Query with is_active=True for '{category}': {len(response.data) if response.data else 0} packages")
                 
                 # If no results, try without is_active filter
                 if not response.data or len(response.data) == 0:
                     print(f"DEBUG - No packages with is_active=True for '{category}', trying without filter...")
-                    response = query.order('is_featured', desc=True).order('display_order').execute()
+                    response = await query.order('is_featured', desc=True).order('display_order').execute()
                     print(f"DEBUG - Query without is_active filter for '{category}': {len(response.data) if response.data else 0} packages")
                     
             except Exception as e:
@@ -1087,11 +1392,20 @@ def get_package_by_interests(
                 traceback.print_exc()
                 # Try simple query as fallback
                 try:
-                    response = supabase.table('packages').select("*").eq('category', category).execute()
+                    response = await async_supabase.table('packages').select(PACKAGE_COLUMNS, count=CountMethod.exact).eq('category', category).limit(5).execute()
                 except Exception as e2:
                     print(f"DEBUG - Fallback query also failed: {e2}")
                     response = None
             
+            return response
+        
+        # Query every category concurrently (one round trip, multiplexed on the pooled HTTP/2
+        # connection) instead of awaiting them one by one; results are merged in category order
+        responses = await asyncio.gather(*(fetch_category(category) for category in categories))
+        for category, response in zip(categories, responses):
+            if response is not None:
+                total_matching += response.count if response.count is not None else len(response.data or [])
+            
             if response and response.data:
                 print(f"DEBUG - Processing {len(response.data)} packages for category '{category}'")
                 for pkg in response.data:
@@ -1154,10 +1468,10 @@ def get_package_by_interests(
             # Search each term in name, description, short_description
             for term in search_terms:
                 # Search in name
-                name_query = supabase.table('packages').select("*").ilike('name', f'%{term}%')
+                name_query = async_supabase.table('packages').select(PACKAGE_COLUMNS).ilike('name', f'%{term}%')
                 if request.travel_agent_id:
                     name_query = name_query.eq('travel_agent_id', request.travel_agent_id)
-                name_response = name_query.order('is_featured', desc=True).limit(5).execute()
+                name_response = await name_query.order('is_featured', desc=True).limit(5).execute()
                 
                 if name_response.data:
                     for pkg in name_response.data:
@@ -1167,10 +1481,10 @@ def get_package_by_interests(
                             package_ids.add(pkg_id)
                 
                 # Search in description
-                desc_query = supabase.table('packages').select("*").ilike('description', f'%{term}%')
+                desc_query = async_supabase.table('packages').select(PACKAGE_COLUMNS).ilike('description', f'%{term}%')
                 if request.travel_agent_id:
                     desc_query = desc_query.eq('travel_agent_id', request.travel_agent_id)
-                desc_response = desc_query.order('is_featured', desc=True).limit(5).execute()
+                desc_response = await desc_query.order('is_featured', desc=True).limit(5).execute()
                 
                 if desc_response.data:
                     for pkg in desc_response.data:
@@ -1181,6 +1495,7 @@ def get_package_by_interests(
             
             if packages:
                 print(f"DEBUG - Found {len(packages)} packages by name/description search")
+            total_matching = len(packages)
         
         # Critical check: Print packages list before final check
         print(f"DEBUG - 🔍 FINAL CHECK: packages list has {len(packages) if packages else 0} items")
@@ -1192,7 +1507,7 @@ def get_package_by_interests(
         
         if not packages or len(packages) == 0:
             # Debug: Check what packages exist in database
-            debug_query = supabase.table('packages').select("id, name, category, is_active").limit(10).execute()
+            debug_query = await async_supabase.table('packages').select("id, name, category, is_active").limit(10).execute()
             total_packages = len(debug_query.data) if debug_query.data else 0
             print(f"DEBUG - Total packages in DB: {total_packages}")
             
@@ -1210,13 +1525,13 @@ def get_package_by_interests(
                         })
                 print(f"DEBUG - Packages by category: {category_packages}")
             
-            # Log to Supabase (async)
-            response_time = (datetime.now() - start_time).total_seconds() * 1000
-            background_tasks.add_task(log_to_supabase, {
-                "timestamp": datetime.now().isoformat(),
+            # Log to Supabase (batched)
+            response_time = (time.perf_counter() - start_perf) * 1000
+            log_to_supabase({
+                "timestamp": request_timestamp,
                 "endpoint": "/api/package/by-interests",
                 "interests": request.interests,
-                "mapped_categories": json.dumps(categories),
+                "mapped_categories": _jdumps(categories),
                 "mapping_method": mapping_method,
                 "total_matching_events": 0,
                 "selected_event_id": None,
@@ -1225,9 +1540,9 @@ def get_package_by_interests(
                 "success": False,
                 "error_message": f"No packages found matching interests: {request.interests}",
                 "response_time_ms": response_time,
-                "client_ip": req.client.host if req.client else "unknown",
-                "user_agent": req.headers.get("user-agent", "unknown")
-            })
+                "client_ip": client_ip,
+                "user_agent": user_agent
+            }, background_tasks)
             
             error_message = f"No packages found matching interests: {request.interests}"
             hint = "Check if packages exist in database with matching categories and is_active=true (or NULL)"
@@ -1237,7 +1552,7 @@ def get_package_by_interests(
             elif category_packages:
                 hint = f"Found packages in categories: {list(category_packages.keys())}. Searched for: {categories}. Check is_active status."
             
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "success": False,
@@ -1255,28 +1570,23 @@ def get_package_by_interests(
         # Step 3: Select up to 5 packages (or all if less than 5)
         selected_packages = packages[:5] if len(packages) > 5 else packages
         
-        # Step 4: Generate conversational descriptions for each package
+        # Step 4: Generate conversational descriptions for each package - all at once (each LLM
+        # call runs in the threadpool), so the wait is the slowest description, not the sum
+        if llm_available and model:
+            suggestions = await asyncio.gather(
+                *(run_in_threadpool(generate_package_suggestion, package) for package in selected_packages),
+                return_exceptions=True
+            )
+        else:
+            suggestions = [None] * len(selected_packages)
+        
         packages_with_suggestions = []
         
-        for package in selected_packages:
-            # Generate conversational description if LLM is available
-            if llm_available and model:
-                try:
-                    chain = package_prompt | model
-                    
-                    llm_response = chain.invoke({
-                        "name": package.get("name", "Unknown Package"),
-                        "category": package.get("category", "package"),
-                        "description": package.get("description") or package.get("short_description", "An amazing travel package"),
-                        "destination": package.get("destination", "Unknown"),
-                        "duration_days": package.get("duration_days", 0),
-                        "price_range": package.get("price_range", "Contact for pricing")
-                    })
-                    suggestion = llm_response.content
-                except Exception as llm_error:
-                    print(f"LLM generation failed: {llm_error}")
-                    suggestion = f"Check out {package.get('name', 'this package')} in {package.get('destination', 'amazing destination')}! {package.get('description', 'An amazing travel experience.')} Duration: {package.get('duration_days', 0)} days."
-            else:
+        for package, suggestion in zip(selected_packages, suggestions):
+            if isinstance(suggestion, Exception):
+                print(f"LLM generation failed: {suggestion}")
+                suggestion = None
+            if suggestion is None:
                 suggestion = f"Check out {package.get('name', 'this package')} in {package.get('destination', 'amazing destination')}! {package.get('description', 'An amazing travel experience.')} Duration: {package.get('duration_days', 0)} days."
             
             package_details = {
@@ -1310,29 +1620,29 @@ def get_package_by_interests(
         if request.phone_number:
             if validate_phone_number(request.phone_number):
                 # Get or create user with name (required)
-                user = get_or_create_user(request.phone_number, username=request.user_name)
+                user = await run_in_threadpool(get_or_create_user, request.phone_number, username=request.user_name)
                 if user:
-                    background_tasks.add_task(track_user_search, request.phone_number, request.interests, "interests", categories, None, len(packages), request.user_name, request.user_source, request.is_domestic)
+                    background_tasks.add_task(run_in_background_pool, track_user_search, request.phone_number, request.interests, "interests", categories, None, total_matching, request.user_name, request.user_source, request.is_domestic)
         
-        # Log to Supabase (async) - SUCCESS CASE
+        # Log to Supabase (batched) - SUCCESS CASE
         first_package = selected_packages[0]
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
-        background_tasks.add_task(log_to_supabase, {
-            "timestamp": datetime.now().isoformat(),
+        response_time = (time.perf_counter() - start_perf) * 1000
+        log_to_supabase({
+            "timestamp": request_timestamp,
             "endpoint": "/api/package/by-interests",
             "interests": request.interests,
-            "mapped_categories": json.dumps(categories),
+            "mapped_categories": _jdumps(categories),
             "mapping_method": mapping_method,
-            "total_matching_events": len(packages),
+            "total_matching_events": total_matching,
             "selected_event_id": first_package.get("id"),
             "selected_event_name": first_package.get("name"),
             "selected_event_category": first_package.get("category"),
             "success": True,
             "error_message": None,
             "response_time_ms": response_time,
-            "client_ip": req.client.host if req.client else "unknown",
-            "user_agent": req.headers.get("user-agent", "unknown")
-        })
+            "client_ip": client_ip,
+            "user_agent": user_agent
+        }, background_tasks)
         
         # Return the conversational response
         response_data = {
@@ -1340,7 +1650,7 @@ def get_package_by_interests(
             "interests": request.interests,
             "mapped_categories": categories,
             "mapping_method": mapping_method,
-            "total_matching_packages": len(packages),
+            "total_matching_packages": total_matching,
             "returned_packages": len(packages_with_suggestions),
             "packages": packages_with_suggestions,
             "source": "Supabase",
@@ -1354,12 +1664,12 @@ def get_package_by_interests(
                 # Generate timestamp in milliseconds for uniqueness
                 timestamp_millis = int(time.time() * 1000)
                 
-                supabase.table('search_results').insert({
+                await async_supabase.table('search_results').insert({
                     "phone_number": request.phone_number,
                     "timestamp_millis": timestamp_millis,
                     "results": response_data,
                     "travel_agent_id": request.travel_agent_id,
-                    "created_at": datetime.now().isoformat(),
+                    "created_at": request_timestamp,
                     "is_domestic": request.is_domestic if request.is_domestic is not None else False
                 }).execute()
                 print(f"✅ Results written for phone: {request.phone_number} at {timestamp_millis}")
@@ -1367,13 +1677,13 @@ def get_package_by_interests(
                 print(f"⚠️ Failed to write kiosk results: {e}")
                 # Don't fail the request if this fails
         
-        return JSONResponse(content=response_data)
+        return ORJSONResponse(content=response_data)
             
     except Exception as e:
-        # Log to Supabase (async) - ERROR CASE
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
-        background_tasks.add_task(log_to_supabase, {
-            "timestamp": datetime.now().isoformat(),
+        # Log to Supabase (batched) - ERROR CASE
+        response_time = (time.perf_counter() - start_perf) * 1000
+        log_to_supabase({
+            "timestamp": request_timestamp,
             "endpoint": "/api/package/by-interests",
             "interests": request.interests if hasattr(request, 'interests') else "unknown",
             "mapped_categories": None,
@@ -1385,10 +1695,10 @@ def get_package_by_interests(
             "success": False,
             "error_message": str(e),
             "response_time_ms": response_time,
-            "client_ip": req.client.host if req.client else "unknown",
-            "user_agent": req.headers.get("user-agent", "unknown")
-        })
-        return JSONResponse(
+            "client_ip": client_ip,
+            "user_agent": user_agent
+        }, background_tasks)
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -1420,12 +1730,16 @@ def get_package_by_destination(
        - Write results to search_results table for real-time push to frontend
        - Frontend subscribes to phone_number to receive results instantly
     """
-    start_time = datetime.now()
+    start_perf = time.perf_counter()
+    request_timestamp = datetime.now().isoformat()  # One wall-clock read per request
+    # Resolve client info once for all log sites below
+    client_ip = req.client.host if req.client else "unknown"
+    user_agent = req.headers.get("user-agent", "unknown")
     try:
         destination = request.destination.strip()
         
         if not destination:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "success": False,
@@ -1444,8 +1758,8 @@ def get_package_by_destination(
             query = query.eq('travel_agent_id', request.travel_agent_id)
             query_or = query_or.eq('travel_agent_id', request.travel_agent_id)
         
-        response = query.order('is_featured', desc=True).order('display_order').execute()
-        response_or = query_or.order('is_featured', desc=True).order('display_order').execute()
+        response = query.order('is_featured', desc=True).order('display_order').limit(PACKAGE_QUERY_LIMIT).execute()
+        response_or = query_or.order('is_featured', desc=True).order('display_order').limit(PACKAGE_QUERY_LIMIT).execute()
         
         packages = []
         package_ids = set()
@@ -1464,9 +1778,9 @@ def get_package_by_destination(
         if not packages:
             # Track search if phone number provided
             if request.phone_number and validate_phone_number(request.phone_number):
-                background_tasks.add_task(track_user_search, request.phone_number, destination, "destination", None, destination, 0)
+                background_tasks.add_task(run_in_background_pool, track_user_search, request.phone_number, destination, "destination", None, destination, 0)
             
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "success": False,
@@ -1483,16 +1797,7 @@ def get_package_by_destination(
         for package in selected_packages:
             if llm_available and model:
                 try:
-                    chain = package_prompt | model
-                    llm_response = chain.invoke({
-                        "name": package.get("name", "Unknown Package"),
-                        "category": package.get("category", "package"),
-                        "description": package.get("description") or package.get("short_description", "An amazing travel package"),
-                        "destination": package.get("destination", "Unknown"),
-                        "duration_days": package.get("duration_days", 0),
-                        "price_range": package.get("price_range", "Contact for pricing")
-                    })
-                    suggestion = llm_response.content
+                    suggestion = generate_package_suggestion(package)
                 except Exception as llm_error:
                     print(f"LLM generation failed: {llm_error}")
                     suggestion = f"Check out {package.get('name', 'this package')} in {package.get('destination', 'amazing destination')}! {package.get('description', 'An amazing travel experience.')} Duration: {package.get('duration_days', 0)} days."
@@ -1532,16 +1837,16 @@ def get_package_by_destination(
             if validate_phone_number(request.phone_number):
                 user = get_or_create_user(request.phone_number)
                 if user:
-                    background_tasks.add_task(track_user_search, request.phone_number, destination, "destination", None, destination, len(packages))
+                    background_tasks.add_task(run_in_background_pool, track_user_search, request.phone_number, destination, "destination", None, destination, len(packages))
         
-        # Log to Supabase (async) - SUCCESS CASE
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
+        # Log to Supabase (batched) - SUCCESS CASE
+        response_time = (time.perf_counter() - start_perf) * 1000
         first_package = selected_packages[0] if selected_packages else None
-        background_tasks.add_task(log_to_supabase, {
-            "timestamp": datetime.now().isoformat(),
+        log_to_supabase({
+            "timestamp": request_timestamp,
             "endpoint": "/api/package/by-destination",
             "interests": destination,
-            "mapped_categories": json.dumps([]),
+            "mapped_categories": "[]",
             "mapping_method": "destination_search",
             "total_matching_events": len(packages),
             "selected_event_id": first_package.get("id") if first_package else None,
@@ -1550,9 +1855,9 @@ def get_package_by_destination(
             "success": True,
             "error_message": None,
             "response_time_ms": response_time,
-            "client_ip": req.client.host if req.client else "unknown",
-            "user_agent": req.headers.get("user-agent", "unknown")
-        })
+            "client_ip": client_ip,
+            "user_agent": user_agent
+        }, background_tasks)
         
         # Return response
         response_data = {
@@ -1576,20 +1881,20 @@ def get_package_by_destination(
                     "timestamp_millis": timestamp_millis,
                     "results": response_data,
                     "travel_agent_id": request.travel_agent_id,
-                    "created_at": datetime.now().isoformat(),
+                    "created_at": request_timestamp,
                     "is_domestic": False  # Default to False for destination searches (can be updated if needed)
                 }).execute()
                 print(f"✅ Results written for phone: {request.phone_number} at {timestamp_millis}")
             except Exception as e:
                 print(f"⚠️ Failed to write kiosk results: {e}")
         
-        return JSONResponse(content=response_data)
+        return ORJSONResponse(content=response_data)
             
     except Exception as e:
-        # Log to Supabase (async) - ERROR CASE
-        response_time = (datetime.now() - start_time).total_seconds() * 1000
-        background_tasks.add_task(log_to_supabase, {
-            "timestamp": datetime.now().isoformat(),
+        # Log to Supabase (batched) - ERROR CASE
+        response_time = (time.perf_counter() - start_perf) * 1000
+        log_to_supabase({
+            "timestamp": request_timestamp,
             "endpoint": "/api/package/by-destination",
             "interests": request.destination if hasattr(request, 'destination') else "unknown",
             "mapped_categories": None,
@@ -1601,10 +1906,10 @@ def get_package_by_destination(
             "success": False,
             "error_message": str(e),
             "response_time_ms": response_time,
-            "client_ip": req.client.host if req.client else "unknown",
-            "user_agent": req.headers.get("user-agent", "unknown")
-        })
-        return JSONResponse(
+            "client_ip": client_ip,
+            "user_agent": user_agent
+        }, background_tasks)
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -1625,169 +1930,8 @@ def view_audit_logs(
     # Return simple HTML without complex CSS that causes f-string issues
     return HTMLResponse(content=generate_logs_html(time_filter, endpoint, status))
 
-def generate_logs_html(time_filter: str = "all", endpoint: str = "all", status: str = "all"):
-    """Generate HTML for logs page (separate function to avoid f-string CSS issues)"""
-    from datetime import timedelta
-    
-    # Filter logs based on criteria
-    filtered_logs = audit_logs.copy()
-    
-    # Time filtering
-    now = datetime.now()
-    if time_filter == "hour":
-        cutoff = now - timedelta(hours=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "day":
-        cutoff = now - timedelta(days=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "week":
-        cutoff = now - timedelta(weeks=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    
-    # Endpoint filtering
-    if endpoint != "all":
-        filtered_logs = [log for log in filtered_logs if log.get("path") == endpoint]
-    
-    # Status filtering
-    if status == "success":
-        filtered_logs = [log for log in filtered_logs if log.get("success", False)]
-    elif status == "failed":
-        filtered_logs = [log for log in filtered_logs if not log.get("success", True)]
-    
-    # Calculate statistics from filtered logs
-    total_logs = len(filtered_logs)
-    successful_logs = sum(1 for log in filtered_logs if log.get("success", False))
-    failed_logs = total_logs - successful_logs
-    success_rate = round((successful_logs / total_logs * 100) if total_logs > 0 else 0, 1)
-    avg_duration = round(sum(log.get("duration_ms", 0) for log in filtered_logs) / total_logs if total_logs > 0 else 0, 2)
-    
-    # Get unique endpoints for filter dropdown
-    unique_endpoints = sorted(set(log.get("path", "") for log in audit_logs if log.get("path")))
-    
-    # Generate log entries HTML
-    log_entries_html = ""
-    if total_logs > 0:
-        for log in reversed(filtered_logs):  # Show newest first
-            success_class = "success" if log.get("success", False) else "error"
-            status_class = "success" if log.get("success", False) else "error"
-            
-            # Format request headers
-            request_headers_html = ""
-            if "request_headers" in log and log["request_headers"]:
-                headers_str = json.dumps(dict(log["request_headers"]), indent=2)
-                headers_str_escaped = html.escape(headers_str)
-                request_headers_html = f"""
-                <div class="collapsible-section">
-                    <button class="collapsible-btn" onclick="toggleSection(this)">📋 Request Headers</button>
-                    <div class="collapsible-content">
-                        <div class="json-box">
-                            <pre>{headers_str_escaped}</pre>
-                        </div>
-                    </div>
-                </div>
-                """
-            
-            # Format request body
-            request_body_html = ""
-            if "request_body" in log and log["request_body"]:
-                body_str = json.dumps(log["request_body"], indent=2) if isinstance(log["request_body"], (dict, list)) else str(log["request_body"])
-                body_str_escaped = html.escape(body_str)
-                request_body_html = f"""
-                <div class="collapsible-section">
-                    <button class="collapsible-btn" onclick="toggleSection(this)">📤 Request Body</button>
-                    <div class="collapsible-content">
-                        <div class="json-box">
-                            <pre>{body_str_escaped}</pre>
-                        </div>
-                    </div>
-                </div>
-                """
-            
-            # Format response headers
-            response_headers_html = ""
-            if "response_headers" in log and log["response_headers"]:
-                resp_headers_str = json.dumps(dict(log["response_headers"]), indent=2)
-                resp_headers_str_escaped = html.escape(resp_headers_str)
-                response_headers_html = f"""
-                <div class="collapsible-section">
-                    <button class="collapsible-btn" onclick="toggleSection(this)">📥 Response Headers</button>
-                    <div class="collapsible-content">
-                        <div class="json-box">
-                            <pre>{resp_headers_str_escaped}</pre>
-                        </div>
-                    </div>
-                </div>
-                """
-            
-            # Format response body
-            response_body_html = ""
-            if "response_body" in log and log["response_body"] is not None:
-                if isinstance(log["response_body"], (dict, list)):
-                    resp_body_str = json.dumps(log["response_body"], indent=2)
-                else:
-                    resp_body_str = str(log["response_body"])
-                resp_body_str_escaped = html.escape(resp_body_str)
-                response_body_html = f"""
-                <div class="collapsible-section">
-                    <button class="collapsible-btn" onclick="toggleSection(this)">📥 Response Body</button>
-                    <div class="collapsible-content">
-                        <div class="json-box">
-                            <pre>{resp_body_str_escaped}</pre>
-                        </div>
-                    </div>
-                </div>
-                """
-            
-            # Format error
-            error_html = ""
-            if log.get("error"):
-                error_html = f"""
-                <div class="error-box">
-                    <strong>❌ Error:</strong> {log["error"]}<br>
-                    <strong>Type:</strong> {log.get("error_type", "Unknown")}
-                </div>
-                """
-            
-            log_entries_html += f"""
-            <div class="log-entry {success_class}">
-                <div class="log-header">
-                    <div>
-                        <span class="method {log['method']}">{log['method']}</span>
-                        <strong>{log['path']}</strong>
-                    </div>
-                    <div>
-                        <span class="status {status_class}">Status: {log.get('status_code', 'N/A')}</span>
-                    </div>
-                </div>
-                <div class="log-details">
-                    <div class="log-row">
-                        <div class="log-label">Timestamp:</div>
-                        <div class="log-value">{log['timestamp']}</div>
-                    </div>
-                    <div class="log-row">
-                        <div class="log-label">Client IP:</div>
-                        <div class="log-value">{log.get('client_ip', 'unknown')}</div>
-                    </div>
-                    <div class="log-row">
-                        <div class="log-label">User Agent:</div>
-                        <div class="log-value">{log.get('user_agent', 'unknown')}</div>
-                    </div>
-                    <div class="log-row">
-                        <div class="log-label">Duration:</div>
-                        <div class="log-value">{log.get('duration_ms', 0)} ms</div>
-                    </div>
-                    {request_headers_html}
-                    {request_body_html}
-                    {response_headers_html}
-                    {response_body_html}
-                    {error_html}
-                </div>
-            </div>
-            """
-    else:
-        log_entries_html = "<p style='text-align: center; color: #999; font-size: 1.2em; padding: 40px;'>📭 No logs yet. Make some API calls to see them here!</p>"
-    
-    html_content = """<!DOCTYPE html>
+# Static scaffold of the /api/logs page, built once at import time
+_LOGS_HTML_HEAD = """<!DOCTYPE html>
     <html>
     <head>
         <title>Spotive API - Audit Logs</title>
@@ -1997,62 +2141,93 @@ def generate_logs_html(time_filter: str = "all", endpoint: str = "all", status:
             <p>Real-time API call monitoring and debugging</p>
             <div>
                 <a href="/api/logs" class="refresh-btn">🔄 Refresh</a>
+                <button type="button" class="refresh-btn" style="margin-left: 10px;" onclick="toggleLive(this)">📡 Live: Off</button>
                 <a href="/api/logs/clear" class="clear-btn">🗑️ Clear Logs</a>
             </div>
             <form method="get" action="/api/logs" class="filters">
-                <div class="filter-group">
+"""
+
+_LOGS_FILTERS_TEMPLATE = """                <div class="filter-group">
                     <label>⏰ Time Filter</label>
                     <select name="time_filter" id="time_filter">
-                        <option value="all" """ + ('selected' if time_filter == 'all' else '') + """>All Time</option>
-                        <option value="hour" """ + ('selected' if time_filter == 'hour' else '') + """>Last Hour</option>
-                        <option value="day" """ + ('selected' if time_filter == 'day' else '') + """>Last 24 Hours</option>
-                        <option value="week" """ + ('selected' if time_filter == 'week' else '') + """>Last Week</option>
+                        <option value="all" {tf_all}>All Time</option>
+                        <option value="hour" {tf_hour}>Last Hour</option>
+                        <option value="day" {tf_day}>Last 24 Hours</option>
+                        <option value="week" {tf_week}>Last Week</option>
                     </select>
                 </div>
                 <div class="filter-group">
                     <label>🔗 Endpoint</label>
                     <select name="endpoint" id="endpoint">
-                        <option value="all" """ + ('selected' if endpoint == 'all' else '') + """>All Endpoints</option>""" + \
-                        ''.join([f'<option value="{ep}" ' + ('selected' if endpoint == ep else '') + f'>{ep}</option>' for ep in unique_endpoints]) + """
+                        <option value="all" {ep_all}>All Endpoints</option>{endpoint_options}
                     </select>
                 </div>
                 <div class="filter-group">
                     <label>✅ Status</label>
                     <select name="status" id="status">
-                        <option value="all" """ + ('selected' if status == 'all' else '') + """>All</option>
-                        <option value="success" """ + ('selected' if status == 'success' else '') + """>Success Only</option>
-                        <option value="failed" """ + ('selected' if status == 'failed' else '') + """>Failed Only</option>
+                        <option value="all" {st_all}>All</option>
+                        <option value="success" {st_success}>Success Only</option>
+                        <option value="failed" {st_failed}>Failed Only</option>
                     </select>
                 </div>
                 <button type="submit" class="filter-btn">🔍 Apply Filters</button>
             </form>
         </div>
         
-        <div class="stats">
+"""
+
+_LOGS_STATS_TEMPLATE = """        <div class="stats">
             <div class="stat-card">
                 <div>Total Requests</div>
-                <div class="stat-value">""" + str(total_logs) + """</div>
+                <div class="stat-value">{total_logs}</div>
             </div>
             <div class="stat-card">
                 <div>Success Rate</div>
-                <div class="stat-value">""" + str(success_rate) + """%</div>
+                <div class="stat-value">{success_rate}%</div>
             </div>
             <div class="stat-card">
                 <div>Failed Requests</div>
-                <div class="stat-value">""" + str(failed_logs) + """</div>
+                <div class="stat-value">{failed_logs}</div>
             </div>
             <div class="stat-card">
                 <div>Avg Response Time</div>
-                <div class="stat-value">""" + str(avg_duration) + """ms</div>
+                <div class="stat-value">{avg_duration}ms</div>
             </div>
         </div>
         
-        <div class="logs-container">
-            """ + log_entries_html + """
+        <div class="logs-container" id="logs-container">
+            """
+
+_LOGS_HTML_TAIL = """
         </div>
         
         <script>
             // Auto-refresh removed as per user request
+            // Live mode is opt-in: new entries arrive pre-rendered over /api/logs/stream and are
+            // prepended, so the page never reloads (open sections and scroll position stay put)
+            let liveSource = null;
+            function toggleLive(btn) {
+                if (liveSource) {
+                    liveSource.close();
+                    liveSource = null;
+                    btn.textContent = '📡 Live: Off';
+                    return;
+                }
+                const params = new URLSearchParams(window.location.search);
+                const query = new URLSearchParams({
+                    endpoint: params.get('endpoint') || 'all',
+                    status: params.get('status') || 'all'
+                });
+                liveSource = new EventSource('/api/logs/stream?' + query);
+                liveSource.onmessage = (event) => {
+                    const container = document.getElementById('logs-container');
+                    const empty = container.querySelector('.logs-empty');
+                    if (empty) empty.remove();
+                    container.insertAdjacentHTML('afterbegin', JSON.parse(event.data));
+                };
+                btn.textContent = '📡 Live: On';
+            }
+            
             function toggleSection(btn) {
                 const content = btn.nextElementSibling;
                 const isActive = content.classList.contains('active');
@@ -2074,31 +2249,219 @@ def generate_logs_html(time_filter: str = "all", endpoint: str = "all", status:
         </script>
     </body>
     </html>
-    """
+"""
+
+_LOGS_EMPTY_HTML = "<p class='logs-empty' style='text-align: center; color: #999; font-size: 1.2em; padding: 40px;'>📭 No logs yet. Make some API calls to see them here!</p>"
+
+_LOG_SECTION_TEMPLATE = """
+                <div class="collapsible-section">
+                    <button class="collapsible-btn" onclick="toggleSection(this)">{title}</button>
+                    <div class="collapsible-content">
+                        <div class="json-box">
+                            <pre>{content}</pre>
+                        </div>
+                    </div>
+                </div>
+                """
+
+_LOG_ERROR_TEMPLATE = """
+                <div class="error-box">
+                    <strong>❌ Error:</strong> {error}<br>
+                    <strong>Type:</strong> {error_type}
+                </div>
+                """
+
+_LOG_ENTRY_TEMPLATE = """
+            <div class="log-entry {success_class}">
+                <div class="log-header">
+                    <div>
+                        <span class="method {method}">{method}</span>
+                        <strong>{path}</strong>
+                    </div>
+                    <div>
+                        <span class="status {success_class}">Status: {status_code}</span>
+                    </div>
+                </div>
+                <div class="log-details">
+                    <div class="log-row">
+                        <div class="log-label">Timestamp:</div>
+                        <div class="log-value">{timestamp}</div>
+                    </div>
+                    <div class="log-row">
+                        <div class="log-label">Client IP:</div>
+                        <div class="log-value">{client_ip}</div>
+                    </div>
+                    <div class="log-row">
+                        <div class="log-label">User Agent:</div>
+                        <div class="log-value">{user_agent}</div>
+                    </div>
+                    <div class="log-row">
+                        <div class="log-label">Duration:</div>
+                        <div class="log-value">{duration_ms} ms</div>
+                    </div>
+                    {request_headers_html}
+                    {request_body_html}
+                    {response_headers_html}
+                    {response_body_html}
+                    {error_html}
+                </div>
+            </div>
+            """
+
+def _log_section_html(title: str, content: str) -> str:
+    """Render one collapsible headers/body section of a log entry"""
+    return _LOG_SECTION_TEMPLATE.format(title=title, content=html.escape(content))
+
+def _log_entry_html(log: LogEntry) -> str:
+    """Render a single audit log entry for the logs page"""
+    request_headers_html = ""
+    if log.request_headers:
+        request_headers_html = _log_section_html("📋 Request Headers", _jdumps(log.request_headers, indent=True))
+    
+    request_body_html = ""
+    if log.request_body:
+        body = log.request_body
+        body_str = _jdumps(body, indent=True) if isinstance(body, (dict, list)) else str(body)
+        request_body_html = _log_section_html("📤 Request Body", body_str)
+    
+    response_headers_html = ""
+    if log.response_headers:
+        response_headers_html = _log_section_html("📥 Response Headers", _jdumps(log.response_headers, indent=True))
+    
+    response_body_html = ""
+    if log.response_body is not None:
+        body = log.response_body
+        resp_body_str = _jdumps(body, indent=True) if isinstance(body, (dict, list)) else str(body)
+        response_body_html = _log_section_html("📥 Response Body", resp_body_str)
+    
+    escaped = log.escaped
+    error_html = ""
+    if log.error:
+        error_html = _LOG_ERROR_TEMPLATE.format(error=escaped["error"], error_type=escaped["error_type"] or "Unknown")
+    
+    return _LOG_ENTRY_TEMPLATE.format(
+        success_class="success" if log.success else "error",
+        method=escaped["method"],
+        path=escaped["path"],
+        status_code=log.status_code,
+        timestamp=escaped["timestamp"],
+        client_ip=escaped["client_ip"],
+        user_agent=escaped["user_agent"],
+        duration_ms=log.duration_ms,
+        request_headers_html=request_headers_html,
+        request_body_html=request_body_html,
+        response_headers_html=response_headers_html,
+        response_body_html=response_body_html,
+        error_html=error_html
+    )
+
+def generate_logs_html(time_filter: str = "all", endpoint: str = "all", status: str = "all"):
+    """Generate HTML for logs page (separate function to avoid f-string CSS issues)"""
+    
+    # Filtering (bisect to the time window, then one pass over that tail for time/endpoint/status)
+    cutoff_epoch = time.time() - TIME_FILTER_SECONDS[time_filter] if time_filter in TIME_FILTER_SECONDS else None
+    with _audit_lock:
+        filtered_logs = _audit_logs_since(cutoff_epoch)
+        unique_endpoints = sorted(_endpoint_counter)  # For filter dropdown
+    filtered_logs = _filter_audit_logs(filtered_logs, cutoff_epoch, endpoint, status)
     
-    return html_content
+    # Calculate statistics from filtered logs
+    total_logs = len(filtered_logs)
+    successful_logs = sum(1 for log in filtered_logs if log.success)
+    failed_logs = total_logs - successful_logs
+    success_rate = round((successful_logs / total_logs * 100) if total_logs > 0 else 0, 1)
+    avg_duration = round(sum(log.duration_ms for log in filtered_logs) / total_logs if total_logs > 0 else 0, 2)
+    
+    def selected(flag: bool) -> str:
+        return "selected" if flag else ""
+    
+    parts = [
+        _LOGS_HTML_HEAD,
+        _LOGS_FILTERS_TEMPLATE.format(
+            tf_all=selected(time_filter == "all"),
+            tf_hour=selected(time_filter == "hour"),
+            tf_day=selected(time_filter == "day"),
+            tf_week=selected(time_filter == "week"),
+            ep_all=selected(endpoint == "all"),
+            endpoint_options="".join(f'<option value="{html.escape(ep)}" {selected(endpoint == ep)}>{html.escape(ep)}</option>' for ep in unique_endpoints),
+            st_all=selected(status == "all"),
+            st_success=selected(status == "success"),
+            st_failed=selected(status == "failed")
+        ),
+        _LOGS_STATS_TEMPLATE.format(
+            total_logs=total_logs,
+            success_rate=success_rate,
+            failed_logs=failed_logs,
+            avg_duration=avg_duration
+        )
+    ]
+    
+    # Log entries, newest first
+    if total_logs > 0:
+        parts.extend(_log_entry_html(log) for log in reversed(filtered_logs))
+    else:
+        parts.append(_LOGS_EMPTY_HTML)
+    
+    parts.append(_LOGS_HTML_TAIL)
+    return "".join(parts)
 
 @app.get("/api/logs/json")
 def get_audit_logs_json():
     """
     Get audit logs as JSON for programmatic access
     """
-    return JSONResponse(content={
-        "total_logs": len(audit_logs),
-        "logs": list(reversed(audit_logs))  # Newest first
+    with _audit_lock:
+        logs = list(audit_logs)
+    
+    return ORJSONResponse(content={
+        "total_logs": len(logs),
+        "logs": [{k: v for k, v in log._asdict().items() if k != "escaped"} for log in reversed(logs)]  # Newest first
     })
 
+LOG_STREAM_KEEPALIVE_SECONDS = 15
+
+@app.get("/api/logs/stream")
+async def stream_audit_logs(request: Request, endpoint: str = "all", status: str = "all"):
+    """
+    Server-Sent Events feed of new audit log entries, each rendered as logs-page HTML
+    """
+    async def event_stream():
+        last_seq = _log_seq
+        while not await request.is_disconnected():
+            if _log_seq == last_seq:
+                try:
+                    await asyncio.wait_for(_audit_log_added.wait(), timeout=LOG_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"  # SSE comment - stops proxies closing an idle stream
+                    continue
+            with _audit_lock:
+                new_count = min(_log_seq - last_seq, len(audit_logs))
+                new_logs = list(islice(audit_logs, len(audit_logs) - new_count, None))
+                last_seq = _log_seq
+            for log in _filter_audit_logs(new_logs, None, endpoint, status):
+                yield f"data: {_jdumps(_log_entry_html(log))}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
 @app.get("/api/logs/clear")
 def clear_audit_logs():
     """
     Clear all audit logs
     """
-    audit_logs.clear()
-    return JSONResponse(content={
+    with _audit_lock:
+        audit_logs.clear()
+        del _audit_window_epochs[:]
+        for counter in (_endpoint_counter, _method_counter, _client_counter, _status_counter, _error_counter):
+            counter.clear()
+    _render_analytics.cache_clear()
+    return ORJSONResponse(content={
         "success": True,
         "message": "All audit logs cleared"
     })
 
+ANALYTICS_CACHE_TTL_SECONDS = 5
+ANALYTICS_CACHE_SEQ_GRANULARITY = 16  # New log entries before a cached dashboard is rebuilt
+
 @app.get("/api/logs/analytics", response_class=HTMLResponse)
 def view_analytics_dashboard(
     time_filter: str = "all",  # all, hour, day, week, custom
@@ -2112,202 +2475,172 @@ def view_analytics_dashboard(
     """
     Advanced analytics dashboard with filters for data scientists
     """
-    from datetime import timedelta
-    
-    # Filter logs based on criteria
-    filtered_logs = audit_logs.copy()
-    
-    # Time filtering
-    now = datetime.now()
-    if time_filter == "hour":
-        cutoff = now - timedelta(hours=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "day":
-        cutoff = now - timedelta(days=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "week":
-        cutoff = now - timedelta(weeks=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
+    # Served from a short-lived cache: the page is rebuilt after ANALYTICS_CACHE_SEQ_GRANULARITY
+    # new log entries or ANALYTICS_CACHE_TTL_SECONDS, whichever comes first
+    return HTMLResponse(content=_render_analytics(
+        time_filter, start_date, end_date, endpoint, status, sort_by, order,
+        _log_seq // ANALYTICS_CACHE_SEQ_GRANULARITY, int(time.time() // ANALYTICS_CACHE_TTL_SECONDS)
+    ))
+
+@lru_cache(maxsize=64)
+def _render_analytics(time_filter, start_date, end_date, endpoint, status, sort_by, order, seq_bucket, ttl_bucket) -> str:
+    """Build the analytics dashboard HTML (seq_bucket and ttl_bucket only key the cache)"""
+    # Time window as epoch bounds (compared against the ts_epoch cached on each log)
+    cutoff_epoch = None
+    custom_range = None
+    if time_filter in TIME_FILTER_SECONDS:
+        cutoff_epoch = time.time() - TIME_FILTER_SECONDS[time_filter]
     elif time_filter == "custom" and start_date and end_date:
         try:
-            start = datetime.fromisoformat(start_date)
-            end = datetime.fromisoformat(end_date)
-            filtered_logs = [log for log in filtered_logs 
-                            if log.get("timestamp") and start <= datetime.fromisoformat(log["timestamp"]) <= end]
+            custom_range = (datetime.fromisoformat(start_date).timestamp(), datetime.fromisoformat(end_date).timestamp())
         except:
             pass  # If date parsing fails, show all logs
     
-    # Endpoint filtering
-    if endpoint != "all":
-        filtered_logs = [log for log in filtered_logs if log.get("path") == endpoint]
-    
-    # Status filtering
-    if status == "success":
-        filtered_logs = [log for log in filtered_logs if log.get("success", False)]
-    elif status == "failed":
-        filtered_logs = [log for log in filtered_logs if not log.get("success", True)]
+    def _keep(log):
+        """Apply endpoint, status and time filters in one short-circuiting check"""
+        if endpoint != "all" and log.path != endpoint:
+            return False
+        if status == "success" and not log.success:
+            return False
+        if status == "failed" and log.success:
+            return False
+        if cutoff_epoch is not None and log.ts_epoch <= cutoff_epoch:
+            return False
+        if custom_range is not None and not (custom_range[0] <= log.ts_epoch <= custom_range[1]):
+            return False
+        return True
+    
+    # With no filters the window is the whole buffer, whose aggregates are already maintained
+    unfiltered = cutoff_epoch is None and custom_range is None and endpoint == "all" and status == "all"
+    window_start = cutoff_epoch if cutoff_epoch is not None else (custom_range[0] if custom_range else None)
+    with _audit_lock:
+        all_logs = _audit_logs_since(window_start)  # Bisected to the time window's tail
+        unique_endpoints = set(_endpoint_counter)
+        if unfiltered:
+            endpoint_counts = Counter(_endpoint_counter)
+            method_counts = Counter(_method_counter)
+            client_ips = Counter(_client_counter)
+            error_types = Counter(_error_counter)
+            successful = _status_counter[True]
+    
+    # Filter logs based on criteria (single pass)
+    filtered_logs = all_logs if unfiltered else [log for log in all_logs if _keep(log)]
+    
+    # Empty window: nothing to sort or aggregate, render the zeroed page straight away
+    if not filtered_logs:
+        empty = Counter()
+        return generate_analytics_html(
+            filtered_logs, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, empty, empty, empty, empty,
+            unique_endpoints, time_filter, endpoint, status, sort_by, order
+        )
     
     # Sorting
     try:
         if sort_by == "timestamp":
-            filtered_logs.sort(key=lambda x: x.get("timestamp", ""), reverse=(order == "desc"))
+            filtered_logs.sort(key=attrgetter("ts_epoch"), reverse=(order == "desc"))
         elif sort_by == "duration":
-            filtered_logs.sort(key=lambda x: x.get("duration_ms", 0), reverse=(order == "desc"))
+            filtered_logs.sort(key=attrgetter("duration_ms"), reverse=(order == "desc"))
         elif sort_by == "status":
-            filtered_logs.sort(key=lambda x: x.get("success", False), reverse=(order == "desc"))
+            filtered_logs.sort(key=attrgetter("success"), reverse=(order == "desc"))
     except:
         pass  # If sorting fails, return unsorted
     
-    # Calculate advanced analytics
+    # Calculate advanced analytics - one pass over filtered_logs feeds every aggregate
     total_filtered = len(filtered_logs)
-    successful = sum(1 for log in filtered_logs if log.get("success", False))
+    if unfiltered:
+        durations = [log.duration_ms for log in filtered_logs]
+    else:
+        successful = 0
+        durations = []
+        endpoint_counts = Counter()  # Endpoint distribution
+        method_counts = Counter()  # Method distribution
+        error_types = Counter()  # Error analysis
+        client_ips = Counter()  # Client analysis
+        
+        for log in filtered_logs:
+            durations.append(log.duration_ms)
+            endpoint_counts[log.path] += 1
+            method_counts[log.method] += 1
+            client_ips[log.client_ip] += 1
+            
+            if log.success:
+                successful += 1
+            elif log.error:
+                error_types[log.error[:100]] += 1  # First 100 chars
+    
     failed = total_filtered - successful
     success_rate = round((successful / total_filtered * 100) if total_filtered > 0 else 0, 2)
     
-    durations = [log.get("duration_ms", 0) for log in filtered_logs if log.get("duration_ms") is not None]
-    avg_duration = round(sum(durations) / len(durations), 2) if durations else 0
-    min_duration = round(min(durations), 2) if durations else 0
-    max_duration = round(max(durations), 2) if durations else 0
-    median_duration = round(sorted(durations)[len(durations)//2], 2) if durations else 0
+    # Sort durations once and read min/max/median/percentiles off the same list
+    durations.sort()
+    n_durations = len(durations)
+    avg_duration = round(sum(durations) / n_durations, 2) if durations else 0
+    min_duration = round(durations[0], 2) if durations else 0
+    max_duration = round(durations[-1], 2) if durations else 0
+    median_duration = round(durations[n_durations // 2], 2) if durations else 0
     
     # Percentiles
-    if durations and len(durations) > 1:
-        sorted_durations = sorted(durations)
-        p95_duration = round(sorted_durations[int(len(sorted_durations)*0.95)], 2)
-        p99_duration = round(sorted_durations[int(len(sorted_durations)*0.99)], 2)
+    if n_durations > 1:
+        p95_duration = round(durations[int(n_durations * 0.95)], 2)
+        p99_duration = round(durations[int(n_durations * 0.99)], 2)
     else:
         p95_duration = 0
         p99_duration = 0
     
-    # Endpoint distribution
-    endpoint_counts = {}
-    for log in filtered_logs:
-        path = log.get("path", "unknown")
-        endpoint_counts[path] = endpoint_counts.get(path, 0) + 1
-    
-    # Method distribution
-    method_counts = {}
-    for log in filtered_logs:
-        method = log.get("method", "unknown")
-        method_counts[method] = method_counts.get(method, 0) + 1
-    
-    # Error analysis
-    error_types = {}
-    for log in filtered_logs:
-        if not log.get("success", True) and log.get("error"):
-            error = log.get("error", "Unknown")[:100]  # First 100 chars
-            error_types[error] = error_types.get(error, 0) + 1
-    
-    # Client analysis
-    client_ips = {}
-    for log in filtered_logs:
-        ip = log.get("client_ip", "unknown")
-        client_ips[ip] = client_ips.get(ip, 0) + 1
-    
-    # Time series data (requests per minute)
-    time_series = {}
-    for log in filtered_logs:
-        if log.get("timestamp"):
-            try:
-                timestamp = datetime.fromisoformat(log["timestamp"])
-                minute_key = timestamp.strftime("%Y-%m-%d %H:%M")
-                time_series[minute_key] = time_series.get(minute_key, 0) + 1
-            except:
-                pass
-    
     # Generate HTML
-    return HTMLResponse(content=generate_analytics_html(
+    return generate_analytics_html(
         filtered_logs, total_filtered, successful, failed, success_rate,
         avg_duration, min_duration, max_duration, median_duration,
         p95_duration, p99_duration, endpoint_counts, method_counts,
-        error_types, client_ips, time_series, time_filter, endpoint, status,
-        sort_by, order
-    ))
+        error_types, client_ips, unique_endpoints, time_filter,
+        endpoint, status, sort_by, order
+    )
 
-def generate_analytics_html(
-    logs, total, successful, failed, success_rate, avg_duration, min_duration,
-    max_duration, median_duration, p95, p99, endpoint_counts, method_counts,
-    error_types, client_ips, time_series, time_filter, endpoint_filter,
-    status_filter, sort_by, order
-):
-    """Generate advanced analytics HTML"""
-    
-    # Generate endpoint options
-    endpoint_options = ""
-    unique_endpoints = set(log.get("path", "") for log in audit_logs if log.get("path"))
-    for ep in sorted(unique_endpoints):
-        selected = "selected" if ep == endpoint_filter else ""
-        endpoint_options += f'<option value="{ep}" {selected}>{ep}</option>'
-    
-    # Generate log rows
-    log_rows = ""
-    for i, log in enumerate(logs[:100]):  # Show top 100
-        success_icon = "✅" if log.get("success", False) else "❌"
-        row_class = "success-row" if log.get("success", False) else "error-row"
-        request_body = json.dumps(log.get("request_body", {}), indent=2) if log.get("request_body") else "N/A"
-        error_msg = log.get("error", "N/A")
-        
-        log_rows += f"""
-        <tr class="{row_class}">
-            <td>{i+1}</td>
-            <td>{success_icon}</td>
-            <td>{log.get('method', 'N/A')}</td>
-            <td>{log.get('path', 'N/A')}</td>
-            <td>{log.get('status_code', 'N/A')}</td>
-            <td>{log.get('duration_ms', 0):.2f}</td>
-            <td>{log.get('timestamp', 'N/A')}</td>
-            <td>{log.get('client_ip', 'N/A')}</td>
-            <td class="truncate" title="{request_body}">{request_body[:50]}...</td>
-            <td class="truncate" title="{error_msg}">{error_msg[:50] if error_msg != 'N/A' else 'N/A'}</td>
-        </tr>
-        """
-    
-    # Generate charts data
-    endpoint_chart_data = json.dumps([{"name": k, "value": v} for k, v in sorted(endpoint_counts.items(), key=lambda x: x[1], reverse=True)[:10]])
-    method_chart_data = json.dumps([{"name": k, "value": v} for k, v in method_counts.items()])
-    time_series_data = json.dumps([{"time": k, "count": v} for k, v in sorted(time_series.items())])
-    
-    html = f"""<!DOCTYPE html>
+# Static dashboard stylesheet - a plain string (no f-string brace doubling), built once at import
+_ANALYTICS_CSS = """            * { margin: 0; padding: 0; box-sizing: border-box; }
+            body { font-family: 'Segoe UI', system-ui, sans-serif; background: #f5f7fa; padding: 20px; }
+            .container { max-width: 1600px; margin: 0 auto; }
+            .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 12px; margin-bottom: 30px; }
+            .header h1 { font-size: 2.5em; margin-bottom: 10px; }
+            .filters { background: white; padding: 25px; border-radius: 12px; margin-bottom: 30px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+            .filter-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 20px; }
+            .filter-group { display: flex; flex-direction: column; }
+            .filter-group label { font-weight: 600; margin-bottom: 8px; color: #333; }
+            .filter-group select, .filter-group input { padding: 10px; border: 2px solid #e1e8ed; border-radius: 6px; font-size: 14px; }
+            .filter-group select:focus, .filter-group input:focus { outline: none; border-color: #667eea; }
+            .btn { background: #667eea; color: white; padding: 12px 24px; border: none; border-radius: 6px; cursor: pointer; font-weight: 600; }
+            .btn:hover { background: #5568d3; }
+            .btn-export { background: #2ecc71; margin-left: 10px; }
+            .btn-export:hover { background: #27ae60; }
+            .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }
+            .stat-card { background: white; padding: 25px; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+            .stat-label { font-size: 0.9em; color: #666; margin-bottom: 8px; }
+            .stat-value { font-size: 2.2em; font-weight: bold; color: #667eea; }
+            .stat-value.success { color: #2ecc71; }
+            .stat-value.error { color: #e74c3c; }
+            .chart-container { background: white; padding: 25px; border-radius: 12px; margin-bottom: 30px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+            .chart-title { font-size: 1.3em; font-weight: 600; margin-bottom: 20px; color: #333; }
+            .chart-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 20px; }
+            .table-container { background: white; padding: 25px; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); overflow-x: auto; }
+            table { width: 100%; border-collapse: collapse; }
+            th { background: #667eea; color: white; padding: 15px; text-align: left; font-weight: 600; }
+            td { padding: 12px 15px; border-bottom: 1px solid #e1e8ed; }
+            .success-row { background: #d4edda; }
+            .error-row { background: #f8d7da; }
+            tr:hover { background: #f8f9fa; }
+            .truncate { max-width: 200px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; cursor: help; }
+            .chart-bar { background: #667eea; height: 30px; margin: 5px 0; display: flex; align-items: center; padding-left: 10px; color: white; border-radius: 4px; }
+            .distribution-item { display: flex; justify-content: space-between; padding: 10px; border-bottom: 1px solid #e1e8ed; }
+            .distribution-item:hover { background: #f8f9fa; }"""
+
+# Dashboard page, compiled once at import (string.Template - no f-string brace doubling for CSS/JS)
+_ANALYTICS_TEMPLATE = string.Template("""<!DOCTYPE html>
     <html>
     <head>
         <title>Spotive API - Advanced Analytics</title>
         <meta charset="UTF-8">
         <style>
-            * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-            body {{ font-family: 'Segoe UI', system-ui, sans-serif; background: #f5f7fa; padding: 20px; }}
-            .container {{ max-width: 1600px; margin: 0 auto; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 12px; margin-bottom: 30px; }}
-            .header h1 {{ font-size: 2.5em; margin-bottom: 10px; }}
-            .filters {{ background: white; padding: 25px; border-radius: 12px; margin-bottom: 30px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-            .filter-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 20px; }}
-            .filter-group {{ display: flex; flex-direction: column; }}
-            .filter-group label {{ font-weight: 600; margin-bottom: 8px; color: #333; }}
-            .filter-group select, .filter-group input {{ padding: 10px; border: 2px solid #e1e8ed; border-radius: 6px; font-size: 14px; }}
-            .filter-group select:focus, .filter-group input:focus {{ outline: none; border-color: #667eea; }}
-            .btn {{ background: #667eea; color: white; padding: 12px 24px; border: none; border-radius: 6px; cursor: pointer; font-weight: 600; }}
-            .btn:hover {{ background: #5568d3; }}
-            .btn-export {{ background: #2ecc71; margin-left: 10px; }}
-            .btn-export:hover {{ background: #27ae60; }}
-            .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin-bottom: 30px; }}
-            .stat-card {{ background: white; padding: 25px; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-            .stat-label {{ font-size: 0.9em; color: #666; margin-bottom: 8px; }}
-            .stat-value {{ font-size: 2.2em; font-weight: bold; color: #667eea; }}
-            .stat-value.success {{ color: #2ecc71; }}
-            .stat-value.error {{ color: #e74c3c; }}
-            .chart-container {{ background: white; padding: 25px; border-radius: 12px; margin-bottom: 30px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-            .chart-title {{ font-size: 1.3em; font-weight: 600; margin-bottom: 20px; color: #333; }}
-            .chart-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 20px; }}
-            .table-container {{ background: white; padding: 25px; border-radius: 12px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); overflow-x: auto; }}
-            table {{ width: 100%; border-collapse: collapse; }}
-            th {{ background: #667eea; color: white; padding: 15px; text-align: left; font-weight: 600; }}
-            td {{ padding: 12px 15px; border-bottom: 1px solid #e1e8ed; }}
-            .success-row {{ background: #d4edda; }}
-            .error-row {{ background: #f8d7da; }}
-            tr:hover {{ background: #f8f9fa; }}
-            .truncate {{ max-width: 200px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; cursor: help; }}
-            .chart-bar {{ background: #667eea; height: 30px; margin: 5px 0; display: flex; align-items: center; padding-left: 10px; color: white; border-radius: 4px; }}
-            .distribution-item {{ display: flex; justify-content: space-between; padding: 10px; border-bottom: 1px solid #e1e8ed; }}
-            .distribution-item:hover {{ background: #f8f9fa; }}
+$css
         </style>
     </head>
     <body>
@@ -2323,45 +2656,45 @@ def generate_analytics_html(
                         <div class="filter-group">
                             <label>Time Range</label>
                             <select name="time_filter" id="timeFilter">
-                                <option value="all" {'selected' if time_filter == 'all' else ''}>All Time</option>
-                                <option value="hour" {'selected' if time_filter == 'hour' else ''}>Past Hour</option>
-                                <option value="day" {'selected' if time_filter == 'day' else ''}>Past 24 Hours</option>
-                                <option value="week" {'selected' if time_filter == 'week' else ''}>Past Week</option>
-                                <option value="custom" {'selected' if time_filter == 'custom' else ''}>Custom Range</option>
+                                <option value="all" $tf_all>All Time</option>
+                                <option value="hour" $tf_hour>Past Hour</option>
+                                <option value="day" $tf_day>Past 24 Hours</option>
+                                <option value="week" $tf_week>Past Week</option>
+                                <option value="custom" $tf_custom>Custom Range</option>
                             </select>
                         </div>
                         <div class="filter-group">
                             <label>Endpoint</label>
                             <select name="endpoint">
                                 <option value="all">All Endpoints</option>
-                                {endpoint_options}
+                                $endpoint_options
                             </select>
                         </div>
                         <div class="filter-group">
                             <label>Status</label>
                             <select name="status">
-                                <option value="all" {'selected' if status_filter == 'all' else ''}>All</option>
-                                <option value="success" {'selected' if status_filter == 'success' else ''}>Success Only</option>
-                                <option value="failed" {'selected' if status_filter == 'failed' else ''}>Failed Only</option>
+                                <option value="all" $st_all>All</option>
+                                <option value="success" $st_success>Success Only</option>
+                                <option value="failed" $st_failed>Failed Only</option>
                             </select>
                         </div>
                         <div class="filter-group">
                             <label>Sort By</label>
                             <select name="sort_by">
-                                <option value="timestamp" {'selected' if sort_by == 'timestamp' else ''}>Timestamp</option>
-                                <option value="duration" {'selected' if sort_by == 'duration' else ''}>Duration</option>
-                                <option value="status" {'selected' if sort_by == 'status' else ''}>Status</option>
+                                <option value="timestamp" $sort_timestamp>Timestamp</option>
+                                <option value="duration" $sort_duration>Duration</option>
+                                <option value="status" $sort_status>Status</option>
                             </select>
                         </div>
                         <div class="filter-group">
                             <label>Order</label>
                             <select name="order">
-                                <option value="desc" {'selected' if order == 'desc' else ''}>Descending</option>
-                                <option value="asc" {'selected' if order == 'asc' else ''}>Ascending</option>
+                                <option value="desc" $order_desc>Descending</option>
+                                <option value="asc" $order_asc>Ascending</option>
                             </select>
                         </div>
                     </div>
-                    <div class="filter-grid" id="customDates" style="display: {'block' if time_filter == 'custom' else 'none'};">
+                    <div class="filter-grid" id="customDates" style="display: $custom_display;">
                         <div class="filter-group">
                             <label>Start Date</label>
                             <input type="datetime-local" name="start_date">
@@ -2379,62 +2712,62 @@ def generate_analytics_html(
             <div class="stats-grid">
                 <div class="stat-card">
                     <div class="stat-label">Total Requests</div>
-                    <div class="stat-value">{total}</div>
+                    <div class="stat-value">$total</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Successful</div>
-                    <div class="stat-value success">{successful}</div>
+                    <div class="stat-value success">$successful</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Failed</div>
-                    <div class="stat-value error">{failed}</div>
+                    <div class="stat-value error">$failed</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Success Rate</div>
-                    <div class="stat-value">{success_rate}%</div>
+                    <div class="stat-value">${success_rate}%</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Avg Response Time</div>
-                    <div class="stat-value">{avg_duration}ms</div>
+                    <div class="stat-value">${avg_duration}ms</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Min Response Time</div>
-                    <div class="stat-value">{min_duration}ms</div>
+                    <div class="stat-value">${min_duration}ms</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Max Response Time</div>
-                    <div class="stat-value">{max_duration}ms</div>
+                    <div class="stat-value">${max_duration}ms</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">Median Response Time</div>
-                    <div class="stat-value">{median_duration}ms</div>
+                    <div class="stat-value">${median_duration}ms</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">P95 Response Time</div>
-                    <div class="stat-value">{p95}ms</div>
+                    <div class="stat-value">${p95}ms</div>
                 </div>
                 <div class="stat-card">
                     <div class="stat-label">P99 Response Time</div>
-                    <div class="stat-value">{p99}ms</div>
+                    <div class="stat-value">${p99}ms</div>
                 </div>
             </div>
 
             <div class="chart-grid">
                 <div class="chart-container">
                     <div class="chart-title">📍 Top Endpoints</div>
-                    {"".join([f'<div class="distribution-item"><span>{k}</span><strong>{v} requests</strong></div>' for k, v in sorted(endpoint_counts.items(), key=lambda x: x[1], reverse=True)[:10]])}
+                    $top_endpoints_html
                 </div>
                 <div class="chart-container">
                     <div class="chart-title">🔧 HTTP Methods</div>
-                    {"".join([f'<div class="distribution-item"><span>{k}</span><strong>{v} requests</strong></div>' for k, v in sorted(method_counts.items(), key=lambda x: x[1], reverse=True)])}
+                    $top_methods_html
                 </div>
             </div>
 
-            {"<div class='chart-container'><div class='chart-title'>⚠️ Top Errors</div>" + "".join([f'<div class="distribution-item"><span class="truncate" title="{k}">{k[:80]}</span><strong>{v} times</strong></div>' for k, v in sorted(error_types.items(), key=lambda x: x[1], reverse=True)[:10]]) + "</div>" if error_types else ""}
+            $top_errors_html
 
             <div class="chart-container">
                 <div class="chart-title">👥 Top Clients</div>
-                {"".join([f'<div class="distribution-item"><span>{k}</span><strong>{v} requests</strong></div>' for k, v in sorted(client_ips.items(), key=lambda x: x[1], reverse=True)[:10]])}
+                $top_clients_html
             </div>
 
             <div class="table-container">
@@ -2455,29 +2788,120 @@ def generate_analytics_html(
                         </tr>
                     </thead>
                     <tbody>
-                        {log_rows}
+                        $log_rows
                     </tbody>
                 </table>
             </div>
         </div>
 
         <script>
-            document.getElementById('timeFilter').addEventListener('change', function() {{
+            document.getElementById('timeFilter').addEventListener('change', function() {
                 document.getElementById('customDates').style.display = 
                     this.value === 'custom' ? 'block' : 'none';
-            }});
+            });
 
-            function exportToCSV() {{
-                window.location.href = '/api/logs/export?time_filter={time_filter}&endpoint={endpoint_filter}&status={status_filter}';
-            }}
+            function exportToCSV() {
+                window.location.href = '$export_url';
+            }
             
             // Removed auto-refresh as per user request
         </script>
     </body>
     </html>
-    """
+""")
+
+def generate_analytics_html(
+    logs, total, successful, failed, success_rate, avg_duration, min_duration,
+    max_duration, median_duration, p95, p99, endpoint_counts, method_counts,
+    error_types, client_ips, unique_endpoints, time_filter,
+    endpoint_filter, status_filter, sort_by, order
+):
+    """Generate advanced analytics HTML"""
+    
+    # Top-N distributions (Counter.most_common selects with a heap, no full sort)
+    top_endpoints = endpoint_counts.most_common(10)
+    top_methods = method_counts.most_common()
+    top_errors = error_types.most_common(10)
+    top_clients = client_ips.most_common(10)
+    
+    # Generate endpoint options
+    endpoint_options = "".join(
+        f'<option value="{html.escape(ep)}" {"selected" if ep == endpoint_filter else ""}>{html.escape(ep)}</option>'
+        for ep in sorted(unique_endpoints)
+    )
     
-    return html
+    # Generate log rows (collected in a list and joined once - no repeated string +=)
+    row_parts = []
+    for i, log in enumerate(logs[:100]):  # Show top 100
+        success_icon = "✅" if log.success else "❌"
+        row_class = "success-row" if log.success else "error-row"
+        request_body = _jdumps(log.request_body, indent=True) if log.request_body else "N/A"
+        error_msg = log.error or "N/A"
+        escaped = log.escaped
+        
+        row_parts.append(f"""
+        <tr class="{row_class}">
+            <td>{i+1}</td>
+            <td>{success_icon}</td>
+            <td>{escaped['method']}</td>
+            <td>{escaped['path']}</td>
+            <td>{log.status_code}</td>
+            <td>{log.duration_ms:.2f}</td>
+            <td>{escaped['timestamp']}</td>
+            <td>{escaped['client_ip']}</td>
+            <td class="truncate" title="{html.escape(request_body)}">{html.escape(request_body[:50])}...</td>
+            <td class="truncate" title="{html.escape(error_msg)}">{html.escape(error_msg[:50])}</td>
+        </tr>
+        """)
+    log_rows = "".join(row_parts)
+    
+    def selected(flag: bool) -> str:
+        return "selected" if flag else ""
+    
+    def distribution_html(items) -> str:
+        return "".join(f'<div class="distribution-item"><span>{html.escape(k)}</span><strong>{v} requests</strong></div>' for k, v in items)
+    
+    top_errors_html = ""
+    if error_types:
+        top_errors_html = "<div class='chart-container'><div class='chart-title'>⚠️ Top Errors</div>" + "".join(f'<div class="distribution-item"><span class="truncate" title="{html.escape(k)}">{html.escape(k[:80])}</span><strong>{v} times</strong></div>' for k, v in top_errors) + "</div>"
+    
+    return _ANALYTICS_TEMPLATE.substitute(
+        css=_ANALYTICS_CSS,
+        tf_all=selected(time_filter == "all"),
+        tf_hour=selected(time_filter == "hour"),
+        tf_day=selected(time_filter == "day"),
+        tf_week=selected(time_filter == "week"),
+        tf_custom=selected(time_filter == "custom"),
+        endpoint_options=endpoint_options,
+        st_all=selected(status_filter == "all"),
+        st_success=selected(status_filter == "success"),
+        st_failed=selected(status_filter == "failed"),
+        sort_timestamp=selected(sort_by == "timestamp"),
+        sort_duration=selected(sort_by == "duration"),
+        sort_status=selected(sort_by == "status"),
+        order_desc=selected(order == "desc"),
+        order_asc=selected(order == "asc"),
+        custom_display="block" if time_filter == "custom" else "none",
+        total=total,
+        successful=successful,
+        failed=failed,
+        success_rate=success_rate,
+        avg_duration=avg_duration,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        median_duration=median_duration,
+        p95=p95,
+        p99=p99,
+        top_endpoints_html=distribution_html(top_endpoints),
+        top_methods_html=distribution_html(top_methods),
+        top_errors_html=top_errors_html,
+        top_clients_html=distribution_html(top_clients),
+        log_rows=log_rows,
+        # URL-encoded, so request-supplied filter values can't break out of the JS string
+        export_url="/api/logs/export?" + urlencode({"time_filter": time_filter, "endpoint": endpoint_filter, "status": status_filter})
+    )
+
+CSV_EXPORT_CHUNK_ROWS = 200  # Rows per streamed chunk of /api/logs/export
 
 @app.get("/api/logs/export")
 def export_logs_csv(
@@ -2486,59 +2910,48 @@ def export_logs_csv(
     status: str = "all"
 ):
     """Export filtered logs as CSV for data analysis"""
-    from datetime import timedelta
     import csv
     from io import StringIO
     
-    # Apply same filtering logic
-    filtered_logs = audit_logs.copy()
-    
-    # Time filtering
-    now = datetime.now()
-    if time_filter == "hour":
-        cutoff = now - timedelta(hours=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "day":
-        cutoff = now - timedelta(days=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    elif time_filter == "week":
-        cutoff = now - timedelta(weeks=1)
-        filtered_logs = [log for log in filtered_logs if log.get("timestamp") and datetime.fromisoformat(log["timestamp"]) > cutoff]
-    
-    if endpoint != "all":
-        filtered_logs = [log for log in filtered_logs if log.get("path") == endpoint]
-    
-    if status == "success":
-        filtered_logs = [log for log in filtered_logs if log.get("success", False)]
-    elif status == "failed":
-        filtered_logs = [log for log in filtered_logs if not log.get("success", True)]
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=[
-        'timestamp', 'method', 'path', 'status_code', 'duration_ms',
-        'success', 'client_ip', 'user_agent', 'request_body', 'error'
-    ])
-    writer.writeheader()
-    
-    for log in filtered_logs:
-        writer.writerow({
-            'timestamp': log.get('timestamp', ''),
-            'method': log.get('method', ''),
-            'path': log.get('path', ''),
-            'status_code': log.get('status_code', ''),
-            'duration_ms': log.get('duration_ms', 0),
-            'success': log.get('success', False),
-            'client_ip': log.get('client_ip', ''),
-            'user_agent': log.get('user_agent', ''),
-            'request_body': json.dumps(log.get('request_body', {})),
-            'error': log.get('error', '')
-        })
+    # Apply same filtering logic (bisect to the time window, then exact check on that tail only)
+    cutoff_epoch = time.time() - TIME_FILTER_SECONDS[time_filter] if time_filter in TIME_FILTER_SECONDS else None
+    with _audit_lock:
+        filtered_logs = _audit_logs_since(cutoff_epoch)
+    filtered_logs = _filter_audit_logs(filtered_logs, cutoff_epoch, endpoint, status)
+    
+    # Stream the CSV in chunks of rows through one reusable buffer instead of building the
+    # whole file first (sync generators are iterated in the threadpool, so each chunk costs
+    # a thread hop - rows are batched rather than yielded one by one)
+    def generate_csv():
+        output = StringIO()
+        writer = csv.DictWriter(output, fieldnames=[
+            'timestamp', 'method', 'path', 'status_code', 'duration_ms',
+            'success', 'client_ip', 'user_agent', 'request_body', 'error'
+        ])
+        writer.writeheader()
+        
+        for i, log in enumerate(filtered_logs, 1):
+            writer.writerow({
+                'timestamp': log.timestamp,
+                'method': log.method,
+                'path': log.path,
+                'status_code': log.status_code,
+                'duration_ms': log.duration_ms,
+                'success': log.success,
+                'client_ip': log.client_ip,
+                'user_agent': log.user_agent,
+                'request_body': _jdumps(log.request_body),
+                'error': log.error
+            })
+            if i % CSV_EXPORT_CHUNK_ROWS == 0:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+        
+        yield output.getvalue()
     
-    from fastapi.responses import StreamingResponse
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        generate_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename=spotive_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"}
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,145 @@
+"""
+Invariants of the in-memory audit log: running aggregates, the time-window index
+and the analytics page cache must always agree with a full rescan of audit_logs.
+"""
+import random
+from collections import Counter
+
+import pytest
+
+from app import main
+
+NOW = 1_700_000_000.0
+
+
+def make_log(ts_epoch, path="/", method="GET", client_ip="10.0.0.1", success=True, error=None):
+    """Build a LogEntry the way the middleware would"""
+    return main.LogEntry(
+        timestamp=main.datetime.fromtimestamp(ts_epoch).isoformat(),
+        ts_epoch=ts_epoch,
+        method=method,
+        path=path,
+        query_params={},
+        client_ip=client_ip,
+        user_agent="pytest",
+        request_headers={},
+        request_body=None,
+        status_code=200 if success else 500,
+        response_headers={},
+        response_body=None,
+        duration_ms=1.0,
+        success=success,
+        error=error,
+        error_type="ValueError" if error else None,
+        escaped={key: "" for key in main._HTML_ESCAPED_FIELDS}
+    )
+
+
+def random_log(rng, ts_epoch):
+    success = rng.random() < 0.7
+    return make_log(
+        ts_epoch,
+        path=rng.choice(["/", "/api/package/by-interests", "/api/package/by-destination"]),
+        method=rng.choice(["GET", "POST"]),
+        client_ip=f"10.0.0.{rng.randint(1, 20)}",
+        success=success,
+        error=None if success else rng.choice(["timeout", "boom " * 40, "bad request"])
+    )
+
+
+def record_out_of_order(count, seed=0):
+    """Record entries stamped with a start time up to 30s before they finish (as real requests are)"""
+    rng = random.Random(seed)
+    for i in range(count):
+        main.record_audit_log(random_log(rng, NOW + i - rng.uniform(0, 30)))
+
+
+@pytest.fixture(autouse=True)
+def empty_audit_log():
+    main.clear_audit_logs()
+    yield
+    main.clear_audit_logs()
+
+
+def test_running_counters_match_full_recount_after_eviction():
+    record_out_of_order(main.MAX_LOGS * 3 + 500)
+
+    logs = list(main.audit_logs)
+    assert len(logs) == main.MAX_LOGS
+    assert main._endpoint_counter == Counter(log.path for log in logs)
+    assert main._method_counter == Counter(log.method for log in logs)
+    assert main._client_counter == Counter(log.client_ip for log in logs)
+    assert main._status_counter == Counter(log.success for log in logs)
+    assert main._error_counter == Counter(log.error[:100] for log in logs if not log.success and log.error)
+
+
+def test_window_epochs_stay_parallel_to_buffer():
+    record_out_of_order(main.MAX_LOGS + 250)
+
+    epochs = list(main._audit_window_epochs)
+    assert len(epochs) == len(main.audit_logs)
+    assert epochs == sorted(epochs)
+    assert all(epoch >= log.ts_epoch for epoch, log in zip(epochs, main.audit_logs))
+
+
+@pytest.mark.parametrize("offset", [-100, 0, 500, 1750, 3499, 5000])
+def test_audit_logs_since_matches_full_scan(offset):
+    record_out_of_order(3500)
+    cut = NOW + offset
+
+    with main._audit_lock:
+        windowed = main._audit_logs_since(cut)
+
+    assert [log for log in windowed if log.ts_epoch > cut] == [log for log in main.audit_logs if log.ts_epoch > cut]
+
+
+def test_audit_logs_since_none_returns_everything():
+    record_out_of_order(50)
+
+    with main._audit_lock:
+        assert main._audit_logs_since(None) == list(main.audit_logs)
+
+
+def render_dashboard():
+    return main.view_analytics_dashboard(
+        time_filter="all", start_date=None, end_date=None, endpoint="all", status="all", sort_by="timestamp", order="desc"
+    ).body
+
+
+def test_analytics_cache_rebuilds_after_seq_bucket(monkeypatch):
+    monkeypatch.setattr(main.time, "time", lambda: NOW)
+    # Start at the beginning of a fresh seq bucket
+    while main._log_seq % main.ANALYTICS_CACHE_SEQ_GRANULARITY:
+        main.record_audit_log(make_log(NOW))
+    main.record_audit_log(make_log(NOW))
+    first = render_dashboard()
+
+    main.record_audit_log(make_log(NOW, path="/cached"))
+    assert render_dashboard() == first  # Same bucket - served from cache
+
+    for _ in range(main.ANALYTICS_CACHE_SEQ_GRANULARITY - 1):
+        main.record_audit_log(make_log(NOW, path="/cached"))
+    assert b"/cached" in render_dashboard()
+
+
+def test_analytics_cache_rebuilds_after_ttl(monkeypatch):
+    clock = [NOW]
+    monkeypatch.setattr(main.time, "time", lambda: clock[0])
+    while main._log_seq % main.ANALYTICS_CACHE_SEQ_GRANULARITY != 1:
+        main.record_audit_log(make_log(NOW))
+    first = render_dashboard()
+
+    main.record_audit_log(make_log(NOW, path="/expired"))
+    assert render_dashboard() == first
+
+    clock[0] += main.ANALYTICS_CACHE_TTL_SECONDS
+    assert b"/expired" in render_dashboard()
+
+
+def test_clear_resets_aggregates():
+    record_out_of_order(100)
+    main.clear_audit_logs()
+
+    assert not main.audit_logs
+    assert not main._audit_window_epochs
+    assert not (main._endpoint_counter or main._method_counter or main._client_counter or main._status_counter or main._error_counter)